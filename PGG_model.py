@@ -1,72 +1,335 @@
+import asyncio
+import functools
+import logging
+
 import mesa
 import numpy as np
 from mesa import agent
 
-from numpy import random
-
+from aggregates import TRACKED, AggregateTracker
+from bands import BandTable
+from collector import ColumnarDataCollector, LatestCollector
 from cooperator import Cooperator
 from defector import Defector
+from checkpoint import FIXED_PARAMS, read_checkpoint, restore_state, save_checkpoint
+from instrumentation import Profiler
+from pgg_agent import COOPERATOR, DEFECTOR, INITIAL_WEALTH, PGGAgent
+from population import Population
+from punishment import punishment_stage
+from spatial import ArrayGrid, moore_offsets
+from streaming import step_record
+from streams import RandomStreams
+from trajectory import TrajectoryWriter
+from vectorized import VectorizedEngine
+
+logger = logging.getLogger(__name__)
 
 
 class PublicGoodGame(mesa.Model):
+    """
+
+    Public goods game between Cooperators and Defectors on a toroidal grid.
+
+    The state of all agents lives in the model's Population arrays. With engine="agents"
+    every agent is a Cooperator or Defector view on its row, stepped by the scheduler.
+    engine="vectorized" creates no agent objects and steps all rows at once with a
+    VectorizedEngine, which is meant for large populations; the grid and the scheduler
+    stay empty and mesa's DataCollector collects no agent level data in that mode.
+
+    grid="array" replaces mesa's MultiGrid by an ArrayGrid that only keeps a flat array of
+    cell counts, for large and sparsely occupied grids where a Python list per cell costs
+    too much memory and time. grid defaults to "array" for the vectorized engine, which
+    never places agents on a MultiGrid, and to "multigrid" for the agent engine.
+
+    With movement="synchronous" the agent engine moves all agents at once in a batched
+    movement stage at the start of a step, with movement="random" every agent moves in its
+    own step in the random activation order. Moves do not depend on the occupancy, so
+    both give the same run from the same seed.
+
+    collector="columnar" replaces mesa's DataCollector with a ColumnarDataCollector that
+    keeps memory bounded by spilling the series to compressed chunks in collector_dir.
+    collector="latest" only keeps the latest reporter values, for runs whose results are
+    consumed step by step through iter_steps or stream_steps. collector="model" is
+    mesa's DataCollector without the per agent Wealth reporter, for long runs that only
+    need the model series.
+
+    All randomness comes from RandomStreams spawned from seed, so two models with the
+    same seed and parameters produce the same run.
+
+    enable_profiling records wall time, calls and allocations of every phase of a step
+    until disable_profiling is called; a model that is not profiled pays nothing for it.
+
+    With trajectory_dir the wealth, moral worth, type and position of every agent after
+    every step are appended to a memory mapped file in trajectory_dir, which
+    TrajectoryReader slices by step range or agent id without loading it.
+
+    With checkpoint_every and checkpoint_dir the full model state is written to
+    checkpoint_dir every checkpoint_every steps, and from_checkpoint resumes it. The
+    collected data is written incrementally, a checkpoint only adds what was collected
+    since the previous one.
+
+    punishment_probabilities defaults to PGGAgent.punishment_probabilities.
+
+    bands is the BandTable that maps moral worth to the probability of contributing and
+    the contribution amount, or the dict of its to_dict. It defaults to the bands and
+    tables of the agent classes with linear interpolation between the bands.
+
+    termination is a list of criteria from termination.py that are checked after every
+    step; the first one that fires stops the run, and stop_reason says why a run stopped.
+
+    """
+
     def __init__(self, num_cooperators, defector_ratio, width=10,
-                 height=10):
+                 height=10, multiplier=1.6, engine="agents", collector="mesa", collector_dir=None,
+                 seed=None, checkpoint_every=None, checkpoint_dir=None, population=None,
+                 punishment_probabilities=None, termination=None, bands=None, grid=None,
+                 movement="synchronous", trajectory_dir=None):
         super().__init__(num_cooperators, defector_ratio, width,
                          height)
+        if engine not in ("agents", "vectorized"):
+            raise ValueError(f"Unknown engine {engine!r}, expected 'agents' or 'vectorized'")
+        if collector not in ("mesa", "model", "columnar", "latest"):
+            raise ValueError(f"Unknown collector {collector!r}, expected 'mesa', 'model', 'columnar' or 'latest'")
+        if grid is None:
+            grid = "array" if engine == "vectorized" else "multigrid"
+        if grid not in ("multigrid", "array"):
+            raise ValueError(f"Unknown grid {grid!r}, expected 'multigrid' or 'array'")
+        if movement not in ("synchronous", "random"):
+            raise ValueError(f"Unknown movement {movement!r}, expected 'synchronous' or 'random'")
+        if checkpoint_every and checkpoint_dir is None:
+            raise ValueError("checkpoint_every needs a checkpoint_dir")
+        self.engine = engine
+        self.collector = collector
+        self.collector_dir = collector_dir
+        self.trajectory_dir = trajectory_dir
+        self.grid_backend = grid
+        self.movement = movement
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_dir = checkpoint_dir
+        if punishment_probabilities is None:
+            punishment_probabilities = PGGAgent.punishment_probabilities
+        self.punishment_probabilities = tuple(punishment_probabilities)
+        if bands is None:
+            bands = BandTable()
+        elif isinstance(bands, dict):
+            bands = BandTable.from_dict(bands)
+        self.bands = bands
+        self.termination = list(termination or [])
+        self.stop_reason = None
+        self.vectorized = None
+        self.reseed(seed)
+        self.population = None
+        self.profiler = None
+        self.pending_switches = {}
         self.num_cooperators = num_cooperators
         self.num_defectors = round(self.num_cooperators * defector_ratio)
         self.defector_ratio = defector_ratio
         self.common_pool = 0
-        self.multiplier = 1.6
+        self.multiplier = multiplier
         self.investment = 0
+        self.decision_step = 0
         self.schedule = mesa.time.RandomActivation(self)
-        self.grid = mesa.space.MultiGrid(width, height, True)
-        self.datacollector = mesa.DataCollector(
-            agent_reporters={"Wealth": "wealth"},
-            model_reporters={"Cooperator Count": count_agent_cooperator,
-                             "Defector Count": count_agent_defector,
-                             "Cooperator Average Wealth": cooperator_average_wealth,
-                             "Defector Average Wealth": defector_average_wealth,
-                             "Population Average Wealth": population_average_wealth,
-                             "Cooperator Average Moral Worth:": cooperator_average_moral_worth,
-                             "Defector Average Moral Worth:": defector_average_moral_worth,
-                             "Population Average Moral Worth": population_average_moral_worth,
-                             "Altruistic Punishment": ap_frequency,
-                             "Antisocial Punishment": asp_frequency,
-                             "AP Money Spent": money_spent_ap,
-                             "AP Money Lost": money_lost_ap,
-                             "ASP Money Spent": money_spent_asp,
-                             "ASP Money Lost": money_lost_asp,
-                             "Common Pool Wealth": common_pool_wealth,
-                             },
-        )
-
-        # Create agents
-        for i in range(int(num_cooperators)):
-            # Create Cooperator
-            moral_worth_initial_values = np.random.normal(5, 3.5, num_cooperators)
-            a = Cooperator(self.next_id(), self)
-            a.moral_worth = moral_worth_initial_values[i]
-
-            # Add the agent to a random grid cell
-            x = self.random.randrange(self.grid.width)
-            y = self.random.randrange(self.grid.height)
-            self.grid.place_agent(a, (x, y))
-            self.schedule.add(a)
-            self.datacollector.collect(self)
-
-        # Create Defector
-        for i in range(int(self.num_defectors)):
-            moral_worth_initial_values = np.random.normal(5, 3.5, self.num_defectors)
-            b = Defector(self.next_id(), self)
-            b.moral_worth = moral_worth_initial_values[i]
-
-            # Add the agent to a random grid cell
-            x = self.random.randrange(self.grid.width)
-            y = self.random.randrange(self.grid.height)
-            self.grid.place_agent(b, (x, y))
-            self.schedule.add(b)
-            self.datacollector.collect(self)
+        if grid == "array":
+            self.grid = ArrayGrid(width, height, True)
+        else:
+            self.grid = mesa.space.MultiGrid(width, height, True)
+        # Moore neighbourhood offsets in the order of MultiGrid.get_neighborhood
+        self.move_offsets = moore_offsets(width, height).tolist()
+        self.aggregates = AggregateTracker()
+        self.reporter_cache = {}
+        self.reporter_step = None
+        model_reporters = dict(MODEL_REPORTERS)
+        if collector == "columnar":
+            self.datacollector = ColumnarDataCollector(model_reporters=model_reporters,
+                                                       agent_reporters={"Wealth": "wealth"},
+                                                       spill_dir=collector_dir)
+        elif collector == "latest":
+            self.datacollector = LatestCollector(model_reporters=model_reporters)
+        elif self.engine == "vectorized" or collector == "model":
+            self.datacollector = mesa.DataCollector(model_reporters=model_reporters)
+        else:
+            self.datacollector = mesa.DataCollector(
+                agent_reporters={"Wealth": "wealth"},
+                model_reporters=model_reporters,
+            )
+
+        if population is None:
+            self.create_population()
+        else:
+            self.attach_population(population)
+        self.datacollector.collect(self)
+        self.trajectory = None
+        if trajectory_dir is not None:
+            # A model created from a population continues the trajectory of its checkpoint
+            self.trajectory = TrajectoryWriter(trajectory_dir, self.population, resume=population is not None)
+            if population is None:
+                self.trajectory.record(self)
+
+    def create_population(self):
+        """
+
+        This method creates all agents in one batched pass. The initial moral worth is
+        drawn once per type and the initial positions once for the whole population.
+
+        """
+        num_cooperators = int(self.num_cooperators)
+        num_defectors = int(self.num_defectors)
+        placement = self.streams.placement
+        moral_worth = np.concatenate([placement.normal(5, 3.5, num_cooperators),
+                                      placement.normal(5, 3.5, num_defectors)])
+        kind = np.repeat([COOPERATOR, DEFECTOR], [num_cooperators, num_defectors])
+        x = placement.integers(self.grid.width, size=len(kind))
+        y = placement.integers(self.grid.height, size=len(kind))
+
+        if self.engine == "vectorized":
+            self.attach_population(Population.from_arrays(kind, moral_worth, x, y, INITIAL_WEALTH))
+            self.vectorized.initialize()
+            return
+
+        self.population = Population(len(kind))
+        self.streams.draw_step(len(kind))
+        agent_classes = {COOPERATOR: Cooperator, DEFECTOR: Defector}
+        for agent_kind, agent_moral_worth, pos in zip(kind.tolist(), moral_worth.tolist(),
+                                                     zip(x.tolist(), y.tolist())):
+            agent = agent_classes[agent_kind](self.next_id(), self)
+            agent.moral_worth = agent_moral_worth
+            self.grid.place_agent(agent, pos)
+            self.schedule.add(agent)
+
+    def attach_population(self, population):
+        """
+
+        This method takes over a Population whose rows already hold the agents' state,
+        creating the agent objects, grid positions and schedule entries for the agent engine
+
+        """
+        self.population = population
+        if self.engine == "vectorized":
+            self.vectorized = VectorizedEngine(self, population)
+            return
+
+        self.streams.draw_step(len(population))
+        agent_classes = {COOPERATOR: Cooperator, DEFECTOR: Defector}
+        for row, agent_kind in enumerate(population.kind[:len(population)].tolist()):
+            agent = agent_classes[agent_kind].view(self, row)
+            self.grid.place_agent(agent, agent.pos)
+            self.schedule.add(agent)
+        self.aggregates.rebuild(population.kind[:len(population)],
+                                {name: getattr(population, name)[:len(population)] for name in TRACKED})
+
+    @classmethod
+    def from_checkpoint(cls, path, mmap=True, **params):
+        """
+
+        Model resumed from a checkpoint directory written by save_checkpoint. With mmap the
+        population arrays are memory mapped copy-on-write instead of read into memory.
+        Keyword arguments replace the constructor parameters stored in the checkpoint,
+        except for FIXED_PARAMS, which the saved state depends on.
+
+        """
+        meta, columns = read_checkpoint(path, mmap)
+        for name in FIXED_PARAMS:
+            if params.get(name) is not None and params[name] != meta["params"][name]:
+                raise ValueError(f"{path} holds a model with {name}={meta['params'][name]!r}, "
+                                 f"it cannot be resumed with {name}={params[name]!r}")
+        params = dict(meta["params"], **params)
+        model = cls(params.pop("num_cooperators"), params.pop("defector_ratio"),
+                    population=Population.from_columns(columns), **params)
+        restore_state(model, meta, path)
+
+        return model
+
+    def reseed(self, seed):
+        """
+
+        Replaces all random streams by new ones spawned from seed
+
+        """
+        self.streams = RandomStreams(seed)
+        self.seed = self.streams.seed
+        # The scheduler shuffles with mesa's random.Random, seeded from its own stream
+        self.random.seed(int(self.streams.schedule.integers(2 ** 63)))
+        if self.vectorized is not None:
+            self.vectorized.streams = self.streams
+
+    def invalidate_reporters(self):
+        """
+
+        Drops the cached reporter values, for changes of the state outside of a step
+
+        """
+        self.reporter_cache.clear()
+        self.reporter_step = None
+
+    def save_checkpoint(self, path=None):
+        save_checkpoint(self, path or self.checkpoint_dir)
+
+    def invalidate_invest_decisions(self):
+        """
+
+        Marks the investment decisions of all agents as stale, every agent draws a new
+        one the next time calculate_invest is called, from the draws of the new step
+
+        """
+        self.decision_step += 1
+        self.streams.draw_step(len(self.population))
+
+    def move_agents(self):
+        """
+
+        The synchronous movement stage of the agent engine. Every agent moves to a random
+        cell of its Moore neighbourhood, with the offsets of all agents picked and wrapped
+        around the torus in one batch. An ArrayGrid recounts its cells in one pass, a
+        MultiGrid still needs one move_agent call per agent.
+
+        """
+        population = self.population
+        size = len(population)
+        offsets = np.array(self.move_offsets, dtype=np.int64).reshape(-1, 2)
+        choice = (self.streams.movement_draws[:size] * len(offsets)).astype(np.int64)
+        x = (population.x[:size] + offsets[choice, 0]) % self.grid.width
+        y = (population.y[:size] + offsets[choice, 1]) % self.grid.height
+
+        if isinstance(self.grid, ArrayGrid):
+            population.x[:size] = x
+            population.y[:size] = y
+            self.grid.rebuild(x, y)
+            return
+
+        for agent, pos in zip(population.agents[:size], zip(x.tolist(), y.tolist())):
+            self.grid.move_agent(agent, pos)
+
+    def queue_switch(self, agent):
+        """
+
+        Records that an agent changes its type at the end of the current step
+
+        """
+        self.pending_switches[agent.unique_id] = agent
+
+    def apply_switches(self):
+        """
+
+        This method flips the type of every queued agent in place, in one pass.
+        The agent keeps its unique_id, row, wealth and the investment decision of the
+        step, everything else starts over and it moves to a random cell like a newly
+        created agent.
+
+        """
+        placement = self.streams.placement
+        for agent in self.pending_switches.values():
+            wealth = agent.wealth
+            invest = agent.invest
+            self.aggregates.remove(agent)
+            agent.__class__ = Defector if agent.kind == COOPERATOR else Cooperator
+            agent.reset(wealth)
+            agent.invest = invest
+            self.aggregates.add(agent)
+
+            x = int(placement.integers(self.grid.width))
+            y = int(placement.integers(self.grid.height))
+            self.grid.move_agent(agent, (x, y))
+        self.pending_switches.clear()
 
     def set_investment(self):
         """
@@ -91,6 +354,20 @@ class PublicGoodGame(mesa.Model):
         self.investment += investment
         self.common_pool += investment
 
+    def punishment_behaviors(self):
+        """
+
+        The punishment stage of the agent engine. Every agent with wealth left punishes
+        or spares one random neighbour, resolved for all agents at once on the investment
+        decisions of the step by punishment_stage.
+
+        """
+        population = self.population
+        size = len(population)
+        changes = punishment_stage(population, self.grid.width, self.grid.height, population.wealth[:size] > 0,
+                                   self.punishment_probabilities, self.streams.punishment)
+        self.aggregates.change_rows(population.kind[:size], changes)
+
     def common_pool_wealth(self):
         self.common_pool += self.investment
 
@@ -106,54 +383,168 @@ class PublicGoodGame(mesa.Model):
 
         return self.payoff
 
-    def step(self):
-        self.schedule.step()
-        self.set_investment()
+    def iter_steps(self, steps=None, stop=None):
+        """
+
+        Steps the model and yields a StepRecord after every step, until the model stops,
+        steps steps have been made or the predicate stop returns True for a record, for
+        example stop=lambda record: record.defector_share > 0.95.
+
+        """
+        step = 0
+        while self.running and (steps is None or step < steps):
+            self.step()
+            step += 1
+            record = step_record(self)
+            yield record
+            if stop is not None and stop(record):
+                self.stop("stop predicate")
+
+    async def stream_steps(self, steps=None, stop=None):
+        """
+
+        Async generator version of iter_steps. Every step runs in a worker thread so the
+        event loop stays responsive while the model steps.
+
+        """
+        step = 0
+        while self.running and (steps is None or step < steps):
+            await asyncio.to_thread(self.step)
+            step += 1
+            record = step_record(self)
+            yield record
+            if stop is not None and stop(record):
+                self.stop("stop predicate")
+
+    def stop(self, reason):
+        """
+
+        Ends the run and records why
+
+        """
+        self.running = False
+        self.stop_reason = reason
+
+    def check_termination(self):
+        record = step_record(self)
+        for criterion in self.termination:
+            reason = criterion.check(self, record)
+            if reason is not None:
+                self.stop(reason)
+                break
+
+    def distribute_payoff(self):
         for agent in self.schedule.agents:
             if isinstance(agent, Cooperator or Defector):
                 agent.wealth += self.calculate_payoff()
+
+    def enable_profiling(self, trace_depth=2):
+        """
+
+        Starts recording every phase of the following steps and returns the Profiler,
+        which exports the per step timeline as CSV, JSON or a Chrome trace
+
+        """
+        if self.profiler is None:
+            self.profiler = Profiler(self, trace_depth)
+        self.profiler.enable()
+
+        return self.profiler
+
+    def disable_profiling(self):
+        """
+
+        Stops recording, the recorded steps stay available in self.profiler
+
+        """
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def step(self):
+        if self.engine == "vectorized":
+            self.vectorized.step()
+        else:
+            self.invalidate_invest_decisions()
+            if self.movement == "synchronous":
+                self.move_agents()
+            self.schedule.step()
+            # Draws the decisions of the agents that did not act, punishment needs all of them
+            self.set_investment()
+            self.punishment_behaviors()
+            self.apply_switches()
+            self.distribute_payoff()
         self.datacollector.collect(self)
+        if self.trajectory is not None:
+            self.trajectory.record(self)
         if self.common_pool_wealth() == 0:
-            self.running = False
+            self.stop("common pool empty")
+        if self.termination and self.running:
+            self.check_termination()
+        if self.checkpoint_every and self.schedule.steps % self.checkpoint_every == 0:
+            self.save_checkpoint()
+
 
 
+def memoized(reporter):
+    """
+
+    Caches the value of a model reporter per model for the current step, keyed by the
+    step counter of the scheduler. Reporters derived from other reporters reuse their
+    values instead of computing them again within one collect.
+
+    """
+    name = reporter.__name__
+
+    @functools.wraps(reporter)
+    def cached(model):
+        cache = model.reporter_cache
+        if model.reporter_step != model.schedule.steps:
+            cache.clear()
+            model.reporter_step = model.schedule.steps
+        if name not in cache:
+            cache[name] = reporter(model)
+
+        return cache[name]
+
+    return cached
+
 
 # Agent Count
 
+@memoized
 def count_agent_cooperator(model):
-    amount_cooperator = sum(1 for agent in model.schedule.agents if isinstance(agent, Cooperator))
+    amount_cooperator = model.aggregates.count[COOPERATOR]
 
     return amount_cooperator
 
 
+@memoized
 def count_agent_defector(model):
-    amount_defector = sum(1 for agent in model.schedule.agents if isinstance(agent, Defector))
+    amount_defector = model.aggregates.count[DEFECTOR]
 
     return amount_defector
 
 
 # Wealth
 
+@memoized
 def common_pool_wealth(model):
     cp_wealth = 0
     cp_wealth += model.common_pool
 
     return cp_wealth
 
+@memoized
 def cooperator_average_wealth(model):
-    cooperators_wealth = [agent.wealth for agent in model.schedule.agents if isinstance(agent, Cooperator)]
-    if len(cooperators_wealth) > 0:
-        n = sum(cooperators_wealth) / len(cooperators_wealth)
-    else:
-        n = 0
-    return n
+    return model.aggregates.average("wealth", COOPERATOR)
 
 
+@memoized
 def defector_average_wealth(model):
-    defectors_wealth = [agent.wealth for agent in model.schedule.agents if isinstance(agent, Defector)]
-    return sum(defectors_wealth) / len(defectors_wealth) if len(defectors_wealth) > 0 else 0
+    return model.aggregates.average("wealth", DEFECTOR)
 
 
+@memoized
 def population_average_wealth(model):
     cooperator_avg_wealth = cooperator_average_wealth(model)
     defector_avg_wealth = defector_average_wealth(model)
@@ -164,28 +555,17 @@ def population_average_wealth(model):
 
 # Moral Worth
 
+@memoized
 def cooperator_average_moral_worth(model):
-    cooperator_moral_worth_report = [agent.moral_worth for agent in model.schedule.agents if
-                                     isinstance(agent, Cooperator)]
-    if len(cooperator_moral_worth_report) > 0:
-        cooperator_avg_moral_worth = sum(cooperator_moral_worth_report) / len(cooperator_moral_worth_report)
-    else:
-        cooperator_avg_moral_worth = 0
-
-    return cooperator_avg_moral_worth
+    return model.aggregates.average("moral_worth", COOPERATOR)
 
 
+@memoized
 def defector_average_moral_worth(model):
-    defector_moral_worth_report = [agent.moral_worth for agent in model.schedule.agents if
-                                   isinstance(agent, Defector)]
-    if len(defector_moral_worth_report) > 0:
-        defector_avg_moral_worth = sum(defector_moral_worth_report) / len(defector_moral_worth_report)
-    else:
-        defector_avg_moral_worth = 0
-
-    return defector_avg_moral_worth
+    return model.aggregates.average("moral_worth", DEFECTOR)
 
 
+@memoized
 def population_average_moral_worth(model):
     cooperator_avg_moral_worth = cooperator_average_moral_worth(model)
     defector_avg_moral_worth = defector_average_moral_worth(model)
@@ -196,51 +576,52 @@ def population_average_moral_worth(model):
 
 #Frequency of each punishment type
 
+@memoized
 def ap_frequency(model):
-    for agent in model.schedule.agents:
-        print(agent.ap_freq)
-        return agent.ap_freq
+    ap_freq = model.aggregates.total("ap_freq")
+    logger.debug("step %d: altruistic punishment %d", model.schedule.steps, ap_freq)
+    return ap_freq
 
 
+@memoized
 def asp_frequency(model):
-    for agent in model.schedule.agents:
-        print(agent.asp_freq)
-        return agent.asp_freq
+    asp_freq = model.aggregates.total("asp_freq")
+    logger.debug("step %d: antisocial punishment %d", model.schedule.steps, asp_freq)
+    return asp_freq
 
 # Money spent and lost within each punishment type
 
+@memoized
 def money_spent_ap(model):
-    money_spent_ap = 0
-    for agent in model.schedule.agents:
-        money_spent_ap += agent.ap_money_spent
-
-    return money_spent_ap
+    return model.aggregates.total("ap_money_spent")
 
+@memoized
 def money_lost_ap(model):
-    money_lost_ap = 0
-    for agent in model.schedule.agents:
-        money_lost_ap += agent.ap_money_lost
-
-    return money_lost_ap
+    return model.aggregates.total("ap_money_lost")
 
+@memoized
 def money_spent_asp(model):
-    money_spent_asp = 0
-    for agent in model.schedule.agents:
-        money_spent_asp += agent.asp_money_spent
-
-    return money_spent_asp
+    return model.aggregates.total("asp_money_spent")
 
+@memoized
 def money_lost_asp(model):
-    money_lost_asp = 0
-    for agent in model.schedule.agents:
-        money_lost_asp += agent.asp_money_lost
-
-    return money_lost_asp
-
-
-
-
-
-
-
-
+    return model.aggregates.total("asp_money_lost")
+
+
+# Model reporters in the order of the collected columns
+MODEL_REPORTERS = {"Cooperator Count": count_agent_cooperator,
+                   "Defector Count": count_agent_defector,
+                   "Cooperator Average Wealth": cooperator_average_wealth,
+                   "Defector Average Wealth": defector_average_wealth,
+                   "Population Average Wealth": population_average_wealth,
+                   "Cooperator Average Moral Worth:": cooperator_average_moral_worth,
+                   "Defector Average Moral Worth:": defector_average_moral_worth,
+                   "Population Average Moral Worth": population_average_moral_worth,
+                   "Altruistic Punishment": ap_frequency,
+                   "Antisocial Punishment": asp_frequency,
+                   "AP Money Spent": money_spent_ap,
+                   "AP Money Lost": money_lost_ap,
+                   "ASP Money Spent": money_spent_asp,
+                   "ASP Money Lost": money_lost_asp,
+                   "Common Pool Wealth": common_pool_wealth,
+}
@@ -0,0 +1,78 @@
+import numpy as np
+
+# Agent attributes summed per agent type
+TRACKED = ("wealth", "moral_worth", "ap_freq", "asp_freq", "ap_money_spent", "asp_money_spent",
+           "ap_money_lost", "asp_money_lost")
+
+
+class AggregateTracker:
+    """
+
+    Running agent counts and per type sums of the tracked attributes.
+
+    Agents register themselves when they are created and unregister when they are removed,
+    every change of a tracked attribute in between is applied as a delta. The model
+    reporters read averages and totals from here instead of scanning the schedule.
+
+    """
+
+    def __init__(self):
+        self.count = [0, 0]
+        self.sums = {name: [0, 0] for name in TRACKED}
+
+    def add(self, agent):
+        self.count[agent.kind] += 1
+        for name in TRACKED:
+            self.sums[name][agent.kind] += getattr(agent, name)
+        agent.tracked = True
+
+    def remove(self, agent):
+        if not agent.tracked:
+            return
+        agent.tracked = False
+        self.count[agent.kind] -= 1
+        for name in TRACKED:
+            if self.count[agent.kind] == 0:
+                # Drop the floating point residue of the running sums
+                self.sums[name][agent.kind] = 0
+            else:
+                self.sums[name][agent.kind] -= getattr(agent, name)
+
+    def change(self, kind, name, delta):
+        self.sums[name][kind] += delta
+
+    def change_rows(self, kind, changes):
+        """
+
+        Applies the changes of a batch update, changes maps tracked attributes to arrays
+        of per agent deltas aligned with kind
+
+        """
+        for name, delta in changes.items():
+            sums = np.bincount(kind, weights=delta, minlength=2)
+            if delta.dtype.kind == "i":
+                sums = sums.astype(np.int64)
+            for index, value in enumerate(sums.tolist()):
+                self.sums[name][index] += value
+
+    def rebuild(self, kind, values):
+        """
+
+        Recomputes all aggregates from arrays in one pass, values maps every tracked
+        attribute to an array aligned with kind
+
+        """
+        self.count = np.bincount(kind, minlength=2).tolist()
+        for name in TRACKED:
+            sums = np.bincount(kind, weights=values[name], minlength=2)
+            if values[name].dtype.kind == "i":
+                sums = sums.astype(np.int64)
+            self.sums[name] = sums.tolist()
+
+    def average(self, name, kind):
+        if self.count[kind] > 0:
+            return self.sums[name][kind] / self.count[kind]
+        return 0
+
+    def total(self, name):
+        return sum(self.sums[name])
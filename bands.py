@@ -0,0 +1,140 @@
+from bisect import bisect_right
+
+import numpy as np
+
+from cooperator import Cooperator
+from defector import Defector
+from pgg_agent import PGGAgent
+
+# How moral worth between two bands and outside the outer bands is mapped
+BETWEEN = ("interpolate", "nearest")
+
+
+class BandTable:
+    """
+
+    Lookup table from moral worth to probability of contributing and contribution amount,
+    per agent type.
+
+    Inside a band the values of the band apply. With between="interpolate" a moral worth
+    in the gap between two bands gets the linear interpolation of their values, with
+    between="nearest" the values of the closer band, ties going to the higher one. Moral
+    worth outside the outer bands gets the values of the outer band either way.
+
+    bands is a sorted sequence of (low, high) ranges, probability and amount hold one row
+    per agent type with one value per band, amount may also be a single row shared by
+    both types. Arrays of moral worth are mapped with one numpy call per table, single
+    agents use the scalar lookups.
+
+    """
+
+    def __init__(self, bands=PGGAgent.BANDS,
+                 probability=(Cooperator.PROBABILITY_CONTRIBUTING, Defector.PROBABILITY_CONTRIBUTING),
+                 amount=PGGAgent.CONTRIBUTION_AMOUNT, between="interpolate"):
+        if between not in BETWEEN:
+            raise ValueError(f"Unknown between {between!r}, expected 'interpolate' or 'nearest'")
+        bands = [(float(low), float(high)) for low, high in bands]
+        if not bands:
+            raise ValueError("A BandTable needs at least one band")
+        for (low, high), (next_low, _) in zip(bands, bands[1:] + [(np.inf, np.inf)]):
+            if not low <= high < next_low:
+                raise ValueError(f"Bands must be sorted and must not overlap, got {bands}")
+        probability = np.array(probability, dtype=np.float64)
+        amount = np.broadcast_to(np.array(amount, dtype=np.float64), probability.shape).copy()
+        if probability.shape != (2, len(bands)):
+            raise ValueError(f"Expected 2 rows of {len(bands)} probabilities, got shape {probability.shape}")
+
+        self.bands = bands
+        self.probability_table = probability
+        self.amount_table = amount
+        self.between = between
+
+        # Both band edges with the band value, np.interp is then flat inside a band and
+        # linear in the gaps
+        self.edges = np.array([edge for band in bands for edge in band])
+        self.edge_probability = np.repeat(probability, 2, axis=1)
+        self.edge_amount = np.repeat(amount, 2, axis=1)
+        # Midpoints of the gaps, the nearest band of a moral worth is the number of
+        # midpoints below it
+        self.midpoints = np.array([(high + next_low) / 2 for (_, high), (next_low, _) in zip(bands, bands[1:])])
+
+        self.scalar_edges = self.edges.tolist()
+        self.scalar_midpoints = self.midpoints.tolist()
+        self.scalar_tables = {
+            "probability": (probability.tolist(), self.edge_probability.tolist()),
+            "amount": (amount.tolist(), self.edge_amount.tolist()),
+        }
+
+    def to_dict(self):
+        return {
+            "bands": self.bands,
+            "probability": self.probability_table.tolist(),
+            "amount": self.amount_table.tolist(),
+            "between": self.between,
+        }
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**values)
+
+    def lookup(self, table, edge_table, kind, moral_worth):
+        kind, moral_worth = np.broadcast_arrays(kind, np.asarray(moral_worth, dtype=np.float64))
+        if self.between == "nearest":
+            band = np.searchsorted(self.midpoints, moral_worth, side="right")
+            return table[kind, band]
+
+        values = np.empty(moral_worth.shape)
+        for agent_kind in range(len(table)):
+            mask = kind == agent_kind
+            values[mask] = np.interp(moral_worth[mask], self.edges, edge_table[agent_kind])
+
+        return values
+
+    def probabilities(self, kind, moral_worth):
+        """
+
+        Probability of contributing for arrays of agent types and moral worth
+
+        """
+        return self.lookup(self.probability_table, self.edge_probability, kind, moral_worth)
+
+    def amounts(self, kind, moral_worth):
+        """
+
+        Contribution amount for arrays of agent types and moral worth
+
+        """
+        return self.lookup(self.amount_table, self.edge_amount, kind, moral_worth)
+
+    def scalar_lookup(self, name, kind, moral_worth):
+        table, edge_table = self.scalar_tables[name]
+        if self.between == "nearest":
+            return table[kind][bisect_right(self.scalar_midpoints, moral_worth)]
+
+        edges = self.scalar_edges
+        values = edge_table[kind]
+        index = bisect_right(edges, moral_worth)
+        if index == 0:
+            return values[0]
+        if index == len(edges):
+            return values[-1]
+        low, high = edges[index - 1], edges[index]
+        share = (moral_worth - low) / (high - low)
+
+        return values[index - 1] + share * (values[index] - values[index - 1])
+
+    def probability(self, kind, moral_worth):
+        """
+
+        Probability of contributing of a single agent
+
+        """
+        return self.scalar_lookup("probability", kind, moral_worth)
+
+    def amount(self, kind, moral_worth):
+        """
+
+        Contribution amount of a single agent
+
+        """
+        return self.scalar_lookup("amount", kind, moral_worth)
@@ -0,0 +1,163 @@
+import argparse
+import csv
+import functools
+import itertools
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PGG_model import PublicGoodGame
+from termination import criteria
+
+INDEX_FIELDS = ["run_id", "num_cooperators", "defector_ratio", "width", "height", "multiplier",
+                "seed", "steps", "engine", "fixation", "stationary_window", "max_seconds",
+                "steps_run", "stop_reason", "seconds"]
+
+
+def sweep(num_cooperators, defector_ratio, grid_sizes, multiplier, seeds, steps, engine="agents",
+          fixation=False, stationary_window=None, max_seconds=None):
+    """
+
+    All the runs of a parameter sweep, one dict per combination of parameters and seed.
+    fixation, stationary_window and max_seconds end runs before steps, see termination.py.
+
+    """
+    runs = []
+    for n, ratio, (width, height), mult, seed in itertools.product(
+            num_cooperators, defector_ratio, grid_sizes, multiplier, seeds):
+        runs.append({
+            "run_id": f"n{n}_r{ratio}_{width}x{height}_m{mult}_s{seed}",
+            "num_cooperators": n,
+            "defector_ratio": ratio,
+            "width": width,
+            "height": height,
+            "multiplier": mult,
+            "seed": seed,
+            "steps": steps,
+            "engine": engine,
+            "fixation": fixation,
+            "stationary_window": stationary_window,
+            "max_seconds": max_seconds,
+        })
+
+    return runs
+
+
+def run_one(run, out_dir):
+    """
+
+    Runs a single model of the sweep and writes its DataCollector frames to out_dir/run_id
+
+    """
+    start = time.perf_counter()
+    model = PublicGoodGame(run["num_cooperators"], run["defector_ratio"], width=run["width"],
+                           height=run["height"], multiplier=run["multiplier"], engine=run["engine"],
+                           seed=run["seed"],
+                           termination=criteria(run["fixation"], run["stationary_window"],
+                                                max_seconds=run["max_seconds"]))
+    for _ in range(run["steps"]):
+        if not model.running:
+            break
+        model.step()
+
+    write_frames(model, os.path.join(out_dir, run["run_id"]))
+
+    return dict(run, steps_run=model.schedule.steps, stop_reason=model.stop_reason or "step limit",
+                seconds=round(time.perf_counter() - start, 3))
+
+
+def write_frames(model, run_dir):
+    """
+
+    Writes the DataCollector frames of a model to run_dir. The frames are written to a
+    temporary directory first and renamed when complete, so an existing run directory
+    always holds a finished run.
+
+    """
+    tmp_dir = run_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    model.datacollector.get_model_vars_dataframe().to_csv(os.path.join(tmp_dir, "model.csv"),
+                                                          index_label="Step")
+    if model.datacollector.agent_reporters:
+        model.datacollector.get_agent_vars_dataframe().to_csv(os.path.join(tmp_dir, "agents.csv"))
+    os.replace(tmp_dir, run_dir)
+
+
+def completed_runs(out_dir):
+    return {name for name in os.listdir(out_dir) if os.path.isdir(os.path.join(out_dir, name))
+            and not name.endswith(".tmp")}
+
+
+def run_pending(function, runs, out_dir, fieldnames, id_field="run_id", processes=None):
+    """
+
+    Runs function(run) on a process pool for every run that has no output in out_dir yet.
+    function writes the output of a run to out_dir/run[id_field] and returns its row of
+    out_dir/index.csv, which is appended as soon as the run completes, so an interrupted
+    batch resumes where it stopped when started again with the same out_dir.
+
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    done = completed_runs(out_dir)
+    pending = [run for run in runs if run[id_field] not in done]
+    print(f"{len(runs) - len(pending)} of {len(runs)} runs already done, running {len(pending)}")
+
+    index_path = os.path.join(out_dir, "index.csv")
+    new_index = not os.path.exists(index_path)
+    with open(index_path, "a", newline="") as index_file, \
+            ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+        index = csv.DictWriter(index_file, fieldnames=fieldnames)
+        if new_index:
+            index.writeheader()
+        futures = [pool.submit(function, run) for run in pending]
+        for finished, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            index.writerow(result)
+            index_file.flush()
+            print(f"[{finished}/{len(pending)}] {result[id_field]} ({result['seconds']}s)")
+
+
+def batch_run(runs, out_dir, processes=None):
+    """
+
+    Runs every run of the sweep that has no output in out_dir yet on a process pool, see
+    run_pending
+
+    """
+    run_pending(functools.partial(run_one, out_dir=out_dir), runs, out_dir, INDEX_FIELDS, processes=processes)
+
+
+def grid_size(value):
+    width, _, height = value.partition("x")
+    return int(width), int(height or width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless parameter sweep of the PublicGoodGame model")
+    parser.add_argument("--num-cooperators", type=int, nargs="+", default=[20])
+    parser.add_argument("--defector-ratio", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--grid", type=grid_size, nargs="+", default=[(10, 10)],
+                        help="grid sizes as WIDTHxHEIGHT")
+    parser.add_argument("--multiplier", type=float, nargs="+", default=[1.6])
+    parser.add_argument("--replicates", type=int, default=1, help="seeds per parameter combination")
+    parser.add_argument("--seed", type=int, default=0, help="first seed, replicates use consecutive seeds")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--engine", choices=["agents", "vectorized"], default="agents")
+    parser.add_argument("--fixation", action="store_true", help="stop a run once one type is eliminated")
+    parser.add_argument("--stationary-window", type=int, default=None,
+                        help="stop a run once its averages are stationary over windows of this many steps")
+    parser.add_argument("--max-seconds", type=float, default=None, help="wall time budget per run")
+    parser.add_argument("--processes", type=int, default=None, help="defaults to all cores")
+    parser.add_argument("--out", default="results")
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.replicates)
+    runs = sweep(args.num_cooperators, args.defector_ratio, args.grid, args.multiplier, seeds,
+                 args.steps, args.engine, args.fixation, args.stationary_window, args.max_seconds)
+    batch_run(runs, args.out, args.processes)
+
+
+if __name__ == '__main__':
+    main()
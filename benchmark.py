@@ -0,0 +1,173 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+
+import mesa
+import numpy as np
+
+from PGG_model import PublicGoodGame
+from batch_run import grid_size
+
+# Marks results whose construction and step times were taken without the profiler,
+# baselines without it were recorded under instrumentation and are not comparable
+TIMING = "uninstrumented"
+
+# Phases a step is broken down into and the profiler phases they are made of, the
+# remaining step time is reported as "other"
+PHASES = {
+    "move": ("move",),
+    "invest": ("calculate_invest", "set_investment"),
+    "punishment": ("punishment_behaviors",),
+    "transform": ("agent_transform", "apply_switches"),
+    "moral_worth": ("moral_worth_assignment",),
+    "collect": ("collect",),
+}
+
+
+def cases(num_cooperators, defector_ratio, grid_sizes, engines):
+    """
+
+    One benchmark case per combination of parameters
+
+    """
+    return [{"name": f"{engine}_n{n}_r{ratio}_{width}x{height}", "engine": engine, "num_cooperators": n,
+             "defector_ratio": ratio, "width": width, "height": height}
+            for engine, n, ratio, (width, height) in itertools.product(engines, num_cooperators,
+                                                                      defector_ratio, grid_sizes)]
+
+
+def run_case(case, steps, repeats, seed=0):
+    """
+
+    Times the construction and steps of one case. Every repeat builds a new model with
+    the same seed and runs it without instrumentation, the fastest repeat is reported
+    to keep the numbers stable on a busy machine. The phases come from one extra
+    profiled run of a fresh model with the same seed, so the cost of the profiler never
+    shows up in the construction and step times.
+
+    """
+    def build():
+        return PublicGoodGame(case["num_cooperators"], case["defector_ratio"], width=case["width"],
+                              height=case["height"], engine=case["engine"], seed=seed)
+
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model = build()
+        construct = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(steps):
+            model.step()
+        step = time.perf_counter() - start
+
+        result = dict(case, construct=construct, step=step / steps)
+        if best is None or result["step"] < best["step"]:
+            best = result
+
+    best["profiled_step"], best["phases"] = phase_breakdown(build(), steps)
+
+    return best
+
+
+def phase_breakdown(model, steps):
+    """
+
+    Step time and self time per phase and step of a profiled run. The rest of the
+    profiled step time, which includes the overhead of the profiler, is reported as
+    "other".
+
+    """
+    profiler = model.enable_profiling()
+    try:
+        start = time.perf_counter()
+        for _ in range(steps):
+            model.step()
+        step = time.perf_counter() - start
+    finally:
+        model.disable_profiling()
+
+    summary = profiler.summary()
+    phases = {phase: sum(summary[name]["self_seconds"] for name in names if name in summary) / steps
+              for phase, names in PHASES.items()}
+    phases["other"] = step / steps - sum(phases.values())
+
+    return step / steps, phases
+
+
+def compare(results, baseline, tolerance):
+    """
+
+    Cases that got slower than the baseline by more than the tolerance, as readable lines.
+    Only the un-instrumented construction and step times are compared, never the profiled
+    step or the phases. Cases missing from the baseline are skipped.
+
+    """
+    if baseline.get("timing") != TIMING:
+        raise ValueError("The baseline was recorded with the profiler installed, record a new one")
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        for metric in ("construct", "step"):
+            if result[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{result['name']} {metric}: {old[metric]:.6f}s -> {result[metric]:.6f}s "
+                                   f"({result[metric] / old[metric] - 1:+.0%})")
+
+    return regressions
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "mesa": mesa.__version__,
+            "machine": platform.machine(), "platform": platform.platform()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of PublicGoodGame construction and steps")
+    parser.add_argument("--num-cooperators", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--defector-ratio", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--grid", type=grid_size, nargs="+", default=[(10, 10), (50, 50)],
+                        help="grid sizes as WIDTHxHEIGHT")
+    parser.add_argument("--engine", choices=["agents", "vectorized"], nargs="+", default=["agents", "vectorized"])
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json", help="where the results are written as JSON")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline, 0.25 is 25%%")
+    args = parser.parse_args()
+
+    results = []
+    for case in cases(args.num_cooperators, args.defector_ratio, args.grid, args.engine):
+        result = run_case(case, args.steps, args.repeats, args.seed)
+        results.append(result)
+        phases = " ".join(f"{phase}={seconds * 1000:.2f}" for phase, seconds in result["phases"].items())
+        print(f"{result['name']}: construct {result['construct'] * 1000:.1f}ms, "
+              f"step {result['step'] * 1000:.2f}ms, profiled step {result['profiled_step'] * 1000:.2f}ms ({phases})")
+
+    with open(args.output, "w") as output:
+        json.dump({"environment": environment(), "timing": TIMING, "steps": args.steps, "repeats": args.repeats,
+                   "results": results}, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            try:
+                regressions = compare(results, json.load(baseline_file), args.tolerance)
+            except ValueError as error:
+                sys.exit(f"{args.baseline}: {error}")
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.baseline}:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from collector import ColumnarDataCollector, LatestCollector, link_or_copy
+from population import FIELDS
+from streams import STREAMS
+
+CHECKPOINT_VERSION = 1
+# Constructor parameters the state in a checkpoint is laid out for, a resumed model
+# cannot change them
+FIXED_PARAMS = ("width", "height", "engine", "grid", "collector")
+
+
+def save_checkpoint(model, path):
+    """
+
+    Writes the full state of a model to the directory path: one .npy file per Population
+    array, the activation order of the scheduler, the collected data and a meta.json with
+    the model scalars, the aggregates and the state of every random stream.
+
+    The checkpoint is written to path.tmp and swapped in when complete, so path always
+    holds a complete checkpoint.
+
+    """
+    path = os.path.normpath(path)
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    if model.trajectory is not None:
+        model.trajectory.flush()
+    population = model.population
+    for name in FIELDS:
+        np.save(os.path.join(tmp, f"{name}.npy"), getattr(population, name)[:len(population)])
+    if model.vectorized is None:
+        np.save(os.path.join(tmp, "schedule.npy"),
+                np.array([agent.row for agent in model.schedule.agents], dtype=np.int64))
+
+    meta = {
+        "version": CHECKPOINT_VERSION,
+        "params": {
+            "num_cooperators": model.num_cooperators,
+            "defector_ratio": model.defector_ratio,
+            "width": model.grid.width,
+            "height": model.grid.height,
+            "multiplier": model.multiplier,
+            "engine": model.engine,
+            "grid": model.grid_backend,
+            "movement": model.movement,
+            "collector": model.collector,
+            "collector_dir": model.collector_dir,
+            "trajectory_dir": model.trajectory_dir,
+            "checkpoint_every": model.checkpoint_every,
+            "checkpoint_dir": model.checkpoint_dir,
+            "punishment_probabilities": model.punishment_probabilities,
+            "bands": model.bands.to_dict(),
+        },
+        "state": {
+            "steps": model.schedule.steps,
+            "time": model.schedule.time,
+            "current_id": model.current_id,
+            "num_defectors": model.num_defectors,
+            "common_pool": model.common_pool,
+            "investment": model.investment,
+            "decision_step": model.decision_step,
+            "running": model.running,
+            "stop_reason": model.stop_reason,
+            "payoff": getattr(model, "payoff", None),
+            "seed": model.seed,
+        },
+        "aggregates": {"count": model.aggregates.count, "sums": model.aggregates.sums},
+        "streams": {name: getattr(model.streams, name).bit_generator.state for name in STREAMS},
+        "random": model.random.getstate(),
+        "collector": save_collector(model.datacollector, tmp, path),
+    }
+    with open(os.path.join(tmp, "meta.json"), "w") as meta_file:
+        json.dump(meta, meta_file, default=lambda value: value.item())
+
+    if os.path.exists(path):
+        old = path + ".old"
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old)
+    else:
+        os.replace(tmp, path)
+
+
+def save_collector(datacollector, path, destination):
+    """
+
+    Writes the data collected so far next to the checkpoint that is being written to
+    path and will be moved to destination, and returns what meta.json needs to restore
+    it. The chunks of a ColumnarDataCollector never change once written, so they are
+    hard linked instead of copied.
+
+    """
+    if isinstance(datacollector, ColumnarDataCollector):
+        datacollector.flush()
+        os.makedirs(os.path.join(path, "collector"))
+        chunks = {}
+        for series_name, series in (("model", datacollector.model_series), ("agents", datacollector.agent_series)):
+            paths = series.chunk_paths()
+            for index, chunk in enumerate(paths):
+                link_or_copy(chunk, os.path.join(path, "collector", f"{series_name}_{index:06d}.npz"))
+            chunks[series_name] = len(paths)
+
+        return {"type": "columnar", "chunks": chunks, "latest": datacollector.latest}
+
+    if isinstance(datacollector, LatestCollector):
+        return {"type": "latest", "step": datacollector.step, "latest": datacollector.latest}
+
+    return save_mesa_segments(datacollector, path, destination)
+
+
+def save_mesa_segments(datacollector, path, destination):
+    """
+
+    Checkpoints mesa's DataCollector incrementally. Every checkpoint adds one segment
+    with the model and agent records collected since the previous checkpoint of the
+    collector and hard links the earlier segments from there, so a checkpoint costs
+    O(steps since the last one) instead of O(run length). If the previous checkpoint
+    is gone, all records are written again as one segment.
+
+    The collector remembers where its segments are in a checkpointed attribute:
+    (checkpoint directory, segment names, model rows saved, agent steps saved).
+
+    """
+    directory, segments, model_rows, agent_steps = getattr(datacollector, "checkpointed", (None, [], 0, 0))
+    if segments and not all(os.path.exists(os.path.join(directory, "collector", f"{name}.json"))
+                            for name in segments):
+        directory, segments, model_rows, agent_steps = None, [], 0, 0
+
+    os.makedirs(os.path.join(path, "collector"))
+    for name in segments:
+        for extension in (".json", ".npz"):
+            source = os.path.join(directory, "collector", name + extension)
+            if os.path.exists(source):
+                link_or_copy(source, os.path.join(path, "collector", name + extension))
+
+    name = f"mesa_{len(segments):06d}"
+    with open(os.path.join(path, "collector", f"{name}.json"), "w") as segment_file:
+        json.dump({column: values[model_rows:] for column, values in datacollector.model_vars.items()},
+                  segment_file, default=lambda value: value.item())
+    steps = list(datacollector._agent_records)[agent_steps:]
+    records = [record for step in steps for record in datacollector._agent_records[step]]
+    if records:
+        columns = list(zip(*records))
+        np.savez(os.path.join(path, "collector", f"{name}.npz"), step=np.array(columns[0]),
+                 agent_id=np.array(columns[1]), values=np.array(columns[2:]).T)
+
+    segments = segments + [name]
+    rows = len(next(iter(datacollector.model_vars.values()), []))
+    datacollector.checkpointed = (destination, segments, rows, len(datacollector._agent_records))
+
+    return {"type": "mesa", "segments": segments}
+
+
+def existing_checkpoint(path):
+    path = os.path.normpath(path)
+    if not os.path.exists(path) and os.path.exists(path + ".old"):
+        # Interrupted while swapping in a new checkpoint
+        return path + ".old"
+    return path
+
+
+def read_checkpoint(path, mmap=True):
+    """
+
+    Reads meta.json and the Population arrays of a checkpoint, memory mapped copy-on-write
+    with mmap so that the files on disk are never changed
+
+    """
+    path = existing_checkpoint(path)
+    with open(os.path.join(path, "meta.json")) as meta_file:
+        meta = json.load(meta_file)
+    if meta["version"] != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {meta['version']} in {path}")
+
+    mmap_mode = "c" if mmap else None
+    columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in FIELDS}
+
+    return meta, columns
+
+
+def restore_state(model, meta, path):
+    """
+
+    Puts everything but the Population arrays back into a model created from a checkpoint
+
+    """
+    path = existing_checkpoint(path)
+    state = meta["state"]
+    model.schedule.steps = state["steps"]
+    model.schedule.time = state["time"]
+    model.current_id = state["current_id"]
+    model.num_defectors = state["num_defectors"]
+    model.common_pool = state["common_pool"]
+    model.investment = state["investment"]
+    model.decision_step = state["decision_step"]
+    model.running = state["running"]
+    model.stop_reason = state["stop_reason"]
+    if state["payoff"] is not None:
+        model.payoff = state["payoff"]
+    model.seed = model.streams.seed = state["seed"]
+
+    model.aggregates.count = list(meta["aggregates"]["count"])
+    model.aggregates.sums = {name: list(sums) for name, sums in meta["aggregates"]["sums"].items()}
+    for name in STREAMS:
+        getattr(model.streams, name).bit_generator.state = meta["streams"][name]
+    version, internal, gauss = meta["random"]
+    model.random.setstate((version, tuple(internal), gauss))
+
+    if model.vectorized is None:
+        agents = model.population.agents
+        for agent in model.schedule.agents:
+            model.schedule.remove(agent)
+        for row in np.load(os.path.join(path, "schedule.npy")).tolist():
+            model.schedule.add(agents[row])
+
+    restore_collector(model.datacollector, meta["collector"], path)
+    model.invalidate_reporters()
+
+
+def restore_collector(datacollector, state, path):
+    if state["type"] == "columnar":
+        for series_name, series in (("model", datacollector.model_series), ("agents", datacollector.agent_series)):
+            series.adopt([os.path.join(path, "collector", f"{series_name}_{index:06d}.npz")
+                          for index in range(state["chunks"][series_name])])
+        datacollector.latest = state["latest"]
+        return
+    if state["type"] == "latest":
+        datacollector.step = state["step"]
+        datacollector.latest = state["latest"]
+        return
+
+    restore_mesa_segments(datacollector, state["segments"], path)
+
+
+def restore_mesa_segments(datacollector, segments, path):
+    datacollector.model_vars = {}
+    datacollector._agent_records = {}
+    for name in segments:
+        with open(os.path.join(path, "collector", f"{name}.json")) as segment_file:
+            for column, values in json.load(segment_file).items():
+                datacollector.model_vars.setdefault(column, []).extend(values)
+        records_path = os.path.join(path, "collector", f"{name}.npz")
+        if os.path.exists(records_path):
+            with np.load(records_path) as records:
+                for step, agent_id, values in zip(records["step"].tolist(), records["agent_id"].tolist(),
+                                                  records["values"].tolist()):
+                    datacollector._agent_records.setdefault(step, []).append((step, agent_id, *values))
+
+    rows = len(next(iter(datacollector.model_vars.values()), []))
+    datacollector.checkpointed = (path, list(segments), rows, len(datacollector._agent_records))
@@ -0,0 +1,207 @@
+import glob
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+
+def link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class ColumnBuffer:
+    """
+
+    Fixed size typed column buffers that are written to a compressed .npz file
+    every time they fill up, so only one chunk of rows is ever held in memory.
+    columns maps every column name to its dtype.
+
+    """
+
+    def __init__(self, columns, chunk_size, prefix):
+        self.columns = list(columns)
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.buffers = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in columns.items()}
+        self.size = 0
+        self.chunk_count = 0
+        # Chunks left behind by an earlier run in the same directory
+        for path in glob.glob(f"{prefix}_*.npz"):
+            os.remove(path)
+
+    def append(self, rows):
+        """
+
+        Appends rows given as a dict of equally long columns
+
+        """
+        rows = {name: np.asarray(rows[name]) for name in self.columns}
+        count = len(rows[self.columns[0]])
+        start = 0
+        while start < count:
+            stop = min(count, start + self.chunk_size - self.size)
+            for name in self.columns:
+                self.buffers[name][self.size:self.size + stop - start] = rows[name][start:stop]
+            self.size += stop - start
+            start = stop
+            if self.size == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """
+
+        Writes the buffered rows to the next chunk file
+
+        """
+        if self.size == 0:
+            return
+        path = f"{self.prefix}_{self.chunk_count:06d}.npz"
+        np.savez_compressed(path, **{name: buffer[:self.size] for name, buffer in self.buffers.items()})
+        self.chunk_count += 1
+        self.size = 0
+
+    def chunk_paths(self):
+        return [f"{self.prefix}_{index:06d}.npz" for index in range(self.chunk_count)]
+
+    def adopt(self, paths):
+        """
+
+        Replaces the content of the buffer with the given chunk files, which are hard
+        linked, or copied where linking is not possible, in order
+
+        """
+        for path in glob.glob(f"{self.prefix}_*.npz"):
+            os.remove(path)
+        self.size = 0
+        self.chunk_count = 0
+        for path in paths:
+            link_or_copy(path, f"{self.prefix}_{self.chunk_count:06d}.npz")
+            self.chunk_count += 1
+
+    def chunks(self):
+        """
+
+        Yields every chunk as a dict of columns, the spilled ones first
+
+        """
+        for path in sorted(glob.glob(f"{self.prefix}_*.npz")):
+            with np.load(path) as chunk:
+                yield {name: chunk[name] for name in self.columns}
+        if self.size:
+            yield {name: buffer[:self.size].copy() for name, buffer in self.buffers.items()}
+
+    def to_frame(self):
+        chunks = list(self.chunks())
+        if not chunks:
+            return pd.DataFrame(columns=self.columns)
+
+        return pd.DataFrame({name: np.concatenate([chunk[name] for chunk in chunks]) for name in self.columns})
+
+
+class ColumnarDataCollector:
+    """
+
+    Bounded memory replacement for mesa.DataCollector.
+
+    Model and agent series are written into preallocated typed NumPy buffers, and each
+    buffer is spilled to compressed .npz chunks in spill_dir when it fills up. The
+    DataFrames are only assembled when get_model_vars_dataframe or
+    get_agent_vars_dataframe is called. Agent reporters are attribute names, which are
+    read straight from the model's Population arrays.
+
+    Without a spill_dir the chunks go to a temporary directory that is deleted together
+    with the collector. Chunks of an earlier run in the same spill_dir are removed.
+
+    """
+
+    def __init__(self, model_reporters=None, agent_reporters=None, spill_dir=None,
+                 chunk_size=4096, agent_chunk_size=1 << 20):
+        self.model_reporters = dict(model_reporters or {})
+        self.agent_reporters = dict(agent_reporters or {})
+        if spill_dir is None:
+            spill_dir = tempfile.mkdtemp(prefix="pgg_collector_")
+            weakref.finalize(self, shutil.rmtree, spill_dir, True)
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = spill_dir
+
+        model_columns = {"Step": np.int64, **dict.fromkeys(self.model_reporters, np.float64)}
+        agent_columns = {"Step": np.int64, "AgentID": np.int64, **dict.fromkeys(self.agent_reporters, np.float64)}
+        self.model_series = ColumnBuffer(model_columns, chunk_size, os.path.join(spill_dir, "model"))
+        self.agent_series = ColumnBuffer(agent_columns, agent_chunk_size, os.path.join(spill_dir, "agents"))
+        self.latest = {}
+
+    @property
+    def model_vars(self):
+        """
+
+        Latest value of every model reporter, in the {name: [value]} shape of
+        mesa.DataCollector.model_vars that the visualization modules read
+
+        """
+        return {name: [value] for name, value in self.latest.items()}
+
+    def collect(self, model):
+        step = model.schedule.steps
+        if self.model_reporters:
+            self.latest = {name: reporter(model) for name, reporter in self.model_reporters.items()}
+            self.model_series.append({"Step": [step], **{name: [value] for name, value in self.latest.items()}})
+
+        if self.agent_reporters:
+            ids, columns = self.agent_columns(model)
+            self.agent_series.append({"Step": np.full(len(ids), step), "AgentID": ids, **columns})
+
+    def agent_columns(self, model):
+        population = model.population
+        columns = {name: getattr(population, attribute)[:len(population)]
+                   for name, attribute in self.agent_reporters.items()}
+        return population.unique_id[:len(population)], columns
+
+    def flush(self):
+        """
+
+        Writes the rows that are still buffered to disk
+
+        """
+        self.model_series.flush()
+        self.agent_series.flush()
+
+    def get_model_vars_dataframe(self):
+        return self.model_series.to_frame().set_index("Step").rename_axis(None)
+
+    def get_agent_vars_dataframe(self):
+        return self.agent_series.to_frame().set_index(["Step", "AgentID"])
+
+
+class LatestCollector:
+    """
+
+    DataCollector stand-in that only keeps the latest value of every model reporter, for
+    runs that consume their results as they go
+
+    """
+
+    def __init__(self, model_reporters=None):
+        self.model_reporters = dict(model_reporters or {})
+        self.agent_reporters = {}
+        self.step = None
+        self.latest = {}
+
+    @property
+    def model_vars(self):
+        return {name: [value] for name, value in self.latest.items()}
+
+    def collect(self, model):
+        self.step = model.schedule.steps
+        self.latest = {name: reporter(model) for name, reporter in self.model_reporters.items()}
+
+    def flush(self):
+        pass
+
+    def get_model_vars_dataframe(self):
+        return pd.DataFrame([self.latest], index=[self.step])
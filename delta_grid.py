@@ -0,0 +1,107 @@
+import base64
+import contextvars
+import json
+import os
+import weakref
+
+import numpy as np
+from mesa.visualization.ModularVisualization import ModularServer, SocketHandler, VisualizationElement
+
+from fast_forward import downsampled_size, occupancy
+from pgg_agent import COOPERATOR, DEFECTOR
+
+# Websocket connection the elements are currently rendered for
+render_connection = contextvars.ContextVar("render_connection", default=None)
+
+
+class DeltaGrid(VisualizationElement):
+    """
+
+    Grid element that only sends the cells that changed since the last frame.
+
+    A frame is the number of cooperators and defectors per cell, read from the model's
+    Population arrays or, for a FastForwardModel, from its snapshot. render returns the
+    changed cells as base64 encoded int32 triples (cell, cooperators, defectors) that
+    DeltaGridModule.js patches into its canvas.
+
+    ModularServer shares one model between all browser tabs but sends every render to
+    the tab that asked for it, so the last frame is kept per websocket connection,
+    together with the model it was taken from. The first frame of a connection or of a
+    new model is sent in full. Deltas need a DeltaGridServer, which tells the element
+    which connection it renders for; without one every frame is sent in full.
+
+    Grids larger than max_size x max_size cells are downsampled to blocks.
+
+    """
+
+    package_includes = []
+    local_includes = ["DeltaGridModule.js"]
+    local_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "js")
+
+    def __init__(self, width, height, max_size=100, canvas_width=500, canvas_height=500,
+                 cooperator_color=(0, 128, 0), defector_color=(255, 0, 0)):
+        super().__init__()
+        self.max_size = max_size
+        _, self.grid_width, self.grid_height = downsampled_size(width, height, max_size)
+        colors = json.dumps({"cooperator": list(cooperator_color), "defector": list(defector_color)})
+        self.js_code = (f"elements.push(new DeltaGridModule({canvas_width}, {canvas_height}, "
+                        f"{self.grid_width}, {self.grid_height}, {colors}));")
+        # connection -> (weak reference to the model, last frame sent)
+        self.last_frames = weakref.WeakKeyDictionary()
+
+    def frame(self, model):
+        """
+
+        Cooperator and defector counts per cell, one row per flat cell index
+
+        """
+        snapshot = getattr(model, "snapshot", None)
+        counts = snapshot.occupancy if snapshot is not None else occupancy(model, self.max_size)
+
+        return np.column_stack([counts[COOPERATOR].ravel(), counts[DEFECTOR].ravel()]).astype(np.int32)
+
+    def render(self, model):
+        frame = self.frame(model)
+        connection = render_connection.get()
+        last_model, last = self.last_frames.get(connection, (None, None)) if connection is not None else (None, None)
+        full = last is None or last_model() is not model or last.shape != frame.shape
+        if full:
+            cells = np.flatnonzero(frame.any(axis=1))
+        else:
+            cells = np.flatnonzero((frame != last).any(axis=1))
+        if connection is not None:
+            self.last_frames[connection] = (weakref.ref(model), frame)
+
+        triples = np.column_stack([cells, frame[cells]]).astype("<i4")
+        return {"full": full, "cells": base64.b64encode(triples.tobytes()).decode("ascii")}
+
+
+class DeltaSocketHandler(SocketHandler):
+    """
+
+    SocketHandler that renders the elements in the context of its own connection
+
+    """
+
+    @property
+    def viz_state_message(self):
+        token = render_connection.set(self)
+        try:
+            return super().viz_state_message
+        finally:
+            render_connection.reset(token)
+
+
+class DeltaGridServer(ModularServer):
+    """
+
+    ModularServer whose websocket connections keep their own DeltaGrid frames
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ModularServer hard-codes its SocketHandler, the first matching rule wins
+        self.wildcard_router.add_rules([(r"/ws", DeltaSocketHandler)])
+        rules = self.wildcard_router.rules
+        rules.insert(0, rules.pop())
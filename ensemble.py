@@ -0,0 +1,115 @@
+import argparse
+import functools
+import itertools
+import os
+import time
+
+from PGG_model import PublicGoodGame
+from batch_run import run_pending, write_frames
+
+INDEX_FIELDS = ["branch_id", "seed", "multiplier", "punishment_probabilities", "steps", "steps_run", "stop_reason",
+                "seconds"]
+
+
+def fork(checkpoint, seed, **params):
+    """
+
+    Independent continuation of the model in a checkpoint, with new random streams spawned
+    from seed and any constructor parameter replaced by params, like multiplier or
+    punishment_probabilities.
+
+    The population arrays are memory mapped copy-on-write, so forks in different processes
+    share the pages of the checkpoint until they change them. A fork does not write to
+    the collector_dir, trajectory_dir or checkpoint_dir of the burn-in unless they are
+    passed again. Parameters in checkpoint.FIXED_PARAMS, like engine and grid, cannot
+    be replaced.
+
+    """
+    params.setdefault("collector_dir", None)
+    params.setdefault("trajectory_dir", None)
+    params.setdefault("checkpoint_every", None)
+    params.setdefault("checkpoint_dir", None)
+    model = PublicGoodGame.from_checkpoint(checkpoint, mmap=True, **params)
+    model.reseed(seed)
+
+    return model
+
+
+def branches(multipliers, punishment_probabilities, seeds):
+    """
+
+    One branch per combination of parameters and seed. A parameter of None keeps the value
+    of the checkpoint.
+
+    """
+    runs = []
+    for multiplier, (index, probabilities), seed in itertools.product(
+            multipliers or [None], enumerate(punishment_probabilities or [None]), seeds):
+        runs.append({
+            "branch_id": f"m{multiplier}_p{index}_s{seed}",
+            "seed": seed,
+            "multiplier": multiplier,
+            "punishment_probabilities": probabilities,
+        })
+
+    return runs
+
+
+def run_branch(checkpoint, branch, steps, out_dir):
+    """
+
+    Forks one branch from the checkpoint, runs it for at most steps more steps and writes
+    its DataCollector frames, burn-in included, to out_dir/branch_id
+
+    """
+    start = time.perf_counter()
+    params = {name: branch[name] for name in ("multiplier", "punishment_probabilities")
+              if branch[name] is not None}
+    model = fork(checkpoint, branch["seed"], **params)
+    first_step = model.schedule.steps
+    for _ in range(steps):
+        if not model.running:
+            break
+        model.step()
+
+    write_frames(model, os.path.join(out_dir, branch["branch_id"]))
+
+    return dict(branch, steps=steps, steps_run=model.schedule.steps - first_step,
+                stop_reason=model.stop_reason or "step limit", seconds=round(time.perf_counter() - start, 3))
+
+
+def run_ensemble(checkpoint, runs, steps, out_dir, processes=None):
+    """
+
+    Runs every branch that has no output in out_dir yet on a process pool, see
+    batch_run.run_pending
+
+    """
+    run_pending(functools.partial(run_branch, checkpoint, steps=steps, out_dir=out_dir), runs, out_dir,
+                INDEX_FIELDS, id_field="branch_id", processes=processes)
+
+
+def probabilities(value):
+    return tuple(float(probability) for probability in value.split(","))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Branches of a burned-in PublicGoodGame checkpoint")
+    parser.add_argument("checkpoint", help="checkpoint directory written by save_checkpoint")
+    parser.add_argument("--steps", type=int, default=100, help="steps of every branch after the checkpoint")
+    parser.add_argument("--multiplier", type=float, nargs="+", default=None)
+    parser.add_argument("--punishment-probabilities", type=probabilities, nargs="+", default=None,
+                        help="comma separated probabilities, one set per branch group")
+    parser.add_argument("--replicates", type=int, default=1, help="seeds per parameter combination")
+    parser.add_argument("--seed", type=int, default=0, help="first seed, replicates use consecutive seeds")
+    parser.add_argument("--processes", type=int, default=None, help="defaults to all cores")
+    parser.add_argument("--out", default="results/ensemble")
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.replicates)
+    runs = branches(args.multiplier, args.punishment_probabilities, seeds)
+    run_ensemble(args.checkpoint, runs, args.steps, args.out, args.processes)
+
+
+if __name__ == '__main__':
+    main()
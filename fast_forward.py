@@ -0,0 +1,132 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+from PGG_model import PublicGoodGame
+
+
+def downsampled_size(width, height, max_size):
+    """
+
+    Block size and the size of the downsampled grid that fits in max_size x max_size cells
+
+    """
+    block = max(1, math.ceil(max(width, height) / max_size))
+
+    return block, math.ceil(width / block), math.ceil(height / block)
+
+
+def occupancy(model, max_size):
+    """
+
+    Number of agents of each type per block of the downsampled grid, as an array of shape
+    (2, width, height) indexed by agent type
+
+    """
+    population = model.population
+    block, width, height = downsampled_size(model.grid.width, model.grid.height, max_size)
+    size = len(population)
+    cells = (population.x[:size] // block) * height + population.y[:size] // block
+    counts = np.bincount(population.kind[:size].astype(np.int64) * width * height + cells,
+                         minlength=2 * width * height)
+
+    return counts.reshape(2, width, height)
+
+
+class Snapshot:
+    """
+
+    What the UI needs of a model at one step: the latest model reporter values and the
+    downsampled grid occupancy
+
+    """
+
+    def __init__(self, model, max_size):
+        self.step = model.schedule.steps
+        self.running = model.running
+        self.model_vars = {name: values[-1] for name, values in model.datacollector.model_vars.items() if values}
+        self.occupancy = occupancy(model, max_size)
+
+
+class FastForwardRunner:
+    """
+
+    Steps a model in a background thread as fast as it runs and publishes a Snapshot at
+    most fps times per second, plus one when the model stops. Readers only ever see
+    complete snapshots, the model itself is never touched outside the worker thread.
+
+    """
+
+    def __init__(self, model, fps=10, max_size=50):
+        self.model = model
+        self.interval = 1 / fps
+        self.max_size = max_size
+        self.snapshot = Snapshot(model, max_size)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def run(self):
+        published = time.monotonic()
+        while self.model.running and not self.stopped.is_set():
+            self.model.step()
+            now = time.monotonic()
+            if now - published >= self.interval:
+                self.snapshot = Snapshot(self.model, self.max_size)
+                published = now
+        self.snapshot = Snapshot(self.model, self.max_size)
+
+
+class FastForwardModel:
+    """
+
+    Stand-in for PublicGoodGame that ModularServer drives in fast forward mode.
+
+    The real model runs in a FastForwardRunner, and step only picks up the latest
+    snapshot, so the frame rate of the UI no longer limits the simulation and rendering
+    cost no longer depends on the number of agents. The visualization elements read
+    model_vars through datacollector like they do for PublicGoodGame.
+
+    The model only keeps the latest reporter values, the UI never reads older ones and a
+    model that steps without end must not grow its collected data with every step.
+
+    """
+
+    def __init__(self, fps=10, max_size=50, **model_params):
+        model_params.setdefault("collector", "latest")
+        self.runner = FastForwardRunner(PublicGoodGame(**model_params), fps, max_size)
+        self.snapshot = self.runner.snapshot
+        self.runner.start()
+
+    @property
+    def datacollector(self):
+        return self
+
+    @property
+    def model_vars(self):
+        return {name: [value] for name, value in self.snapshot.model_vars.items()}
+
+    @property
+    def running(self):
+        return self.snapshot.running
+
+    @running.setter
+    def running(self, running):
+        # ModularServer sets running on every new model, only stopping is passed on
+        if not running:
+            self.runner.stop()
+
+    def step(self):
+        self.snapshot = self.runner.snapshot
+
+    def stop(self):
+        self.runner.stop()
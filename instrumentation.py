@@ -0,0 +1,195 @@
+import csv
+import json
+import sys
+import time
+
+from pgg_agent import PGGAgent
+
+# Agent methods that are timed per call with the agent engine
+AGENT_PHASES = ("move", "calculate_invest", "agent_transform", "moral_worth_assignment")
+# Methods of the VectorizedEngine that are timed with the vectorized engine
+ENGINE_PHASES = ("move", "calculate_invest", "punishment_behaviors", "agent_transform", "moral_worth_assignment",
+                 "update_aggregates")
+
+ROW_FIELDS = ["step", "phase", "calls", "seconds", "self_seconds", "blocks"]
+
+# Enabled profilers of agent engine models by model. The AGENT_PHASES methods are
+# wrapped on PGGAgent once for all of them, and put back when the last one is disabled.
+agent_profilers = {}
+agent_methods = {}
+
+
+def wrap_agent_methods():
+    for name in AGENT_PHASES:
+        agent_methods[name] = PGGAgent.__dict__[name]
+        setattr(PGGAgent, name, agent_timed(name, agent_methods[name]))
+
+
+def unwrap_agent_methods():
+    for name, function in agent_methods.items():
+        setattr(PGGAgent, name, function)
+    agent_methods.clear()
+
+
+def agent_timed(phase, function):
+    def timed(agent, *args, **kwargs):
+        profiler = agent_profilers.get(agent.model)
+        if profiler is None:
+            return function(agent, *args, **kwargs)
+        return profiler.call(phase, function, (agent,) + args, kwargs)
+
+    return timed
+
+
+class Profiler:
+    """
+
+    Opt-in per phase instrumentation of a PublicGoodGame.
+
+    enable wraps the methods that implement the phases of a step, and disable puts the
+    original methods back, so a model that is not profiled runs exactly the same code as
+    before. Agents have __slots__, so their methods are wrapped on PGGAgent, shared by
+    all profiled models through agent_profilers, and a call is recorded by the profiler
+    of the model of the agent.
+
+    For every step and phase the profiler records the number of calls, the wall time
+    including nested phases (seconds), the wall time without them (self_seconds) and the
+    change in allocated memory blocks. Every call up to trace_depth levels below the
+    model step is also kept as an event of the Chrome trace.
+
+    """
+
+    def __init__(self, model, trace_depth=2):
+        self.model = model
+        self.trace_depth = trace_depth
+        self.enabled = False
+        self.wrapped = []
+        self.stack = []
+        self.current = {}
+        self.pending_events = []
+        self.rows = []
+        self.events = []
+        self.origin = time.perf_counter()
+
+    def targets(self):
+        model = self.model
+        targets = [(model, "step", "step"), (model.datacollector, "collect", "collect")]
+        if model.vectorized is not None:
+            targets += [(model.vectorized, name, name) for name in ENGINE_PHASES]
+        else:
+            targets += [(model, "move_agents", "move"), (model.schedule, "step", "schedule.step"),
+                        (model, "apply_switches", "apply_switches"),
+                        (model, "set_investment", "set_investment"),
+                        (model, "punishment_behaviors", "punishment_behaviors"), (model, "distribute_payoff", "payoff")]
+
+        return targets
+
+    def enable(self):
+        if self.enabled:
+            return
+        for owner, name, phase in self.targets():
+            self.wrap(owner, name, phase)
+        if self.model.vectorized is None:
+            if not agent_profilers:
+                wrap_agent_methods()
+            agent_profilers[self.model] = self
+        self.enabled = True
+
+    def disable(self):
+        if agent_profilers.get(self.model) is self:
+            del agent_profilers[self.model]
+            if not agent_profilers:
+                unwrap_agent_methods()
+        for owner, name, had_attribute, previous in reversed(self.wrapped):
+            if had_attribute:
+                setattr(owner, name, previous)
+            else:
+                delattr(owner, name)
+        self.wrapped = []
+        self.enabled = False
+
+    def wrap(self, owner, name, phase):
+        function = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            return self.call(phase, function, args, kwargs)
+
+        self.wrapped.append((owner, name, name in vars(owner), vars(owner).get(name)))
+        setattr(owner, name, timed)
+
+    def call(self, phase, function, args, kwargs):
+        # Seconds spent in nested phases, filled in by the calls below this one
+        nested = [0.0]
+        self.stack.append(nested)
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            blocks = sys.getallocatedblocks() - blocks
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1][0] += seconds
+
+            totals = self.current.setdefault(phase, [0, 0.0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += seconds - nested[0]
+            totals[3] += blocks
+            if len(self.stack) < self.trace_depth:
+                self.pending_events.append((phase, start, seconds, blocks))
+            if not self.stack:
+                self.end_step()
+
+    def end_step(self):
+        """
+
+        Closes the step that just finished, called when the outermost phase returns
+
+        """
+        step = self.model.schedule.steps
+        for phase, (calls, seconds, self_seconds, blocks) in self.current.items():
+            self.rows.append({"step": step, "phase": phase, "calls": calls, "seconds": seconds,
+                              "self_seconds": self_seconds, "blocks": blocks})
+        self.events.extend((step,) + event for event in self.pending_events)
+        self.current = {}
+        self.pending_events = []
+
+    def summary(self):
+        """
+
+        Totals of every phase over all recorded steps
+
+        """
+        totals = {}
+        for row in self.rows:
+            phase = totals.setdefault(row["phase"], dict.fromkeys(ROW_FIELDS[2:], 0))
+            for field in ROW_FIELDS[2:]:
+                phase[field] += row[field]
+
+        return totals
+
+    def to_csv(self, path):
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=ROW_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+    def to_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.rows, file, indent=1)
+
+    def to_chrome_trace(self, path):
+        """
+
+        Writes the recorded calls in the Chrome trace event format, which can be opened
+        in chrome://tracing or Perfetto
+
+        """
+        events = [{"name": phase, "ph": "X", "pid": 0, "tid": 0,
+                   "ts": (start - self.origin) * 1e6, "dur": seconds * 1e6,
+                   "args": {"step": step, "blocks": blocks}}
+                  for step, phase, start, seconds, blocks in self.events]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,76 @@
+/*
+Grid of agent counts per cell that is patched with the delta frames of DeltaGrid.
+
+Every frame holds base64 encoded little endian int32 triples (cell, cooperators,
+defectors) of the cells that changed since the previous frame, or of all occupied cells
+when "full" is set. Only the changed cells are redrawn.
+*/
+const DeltaGridModule = function (canvasWidth, canvasHeight, gridWidth, gridHeight, colors) {
+  const parent = document.createElement("div");
+  parent.style.height = `${canvasHeight}px`;
+  parent.className = "world-grid-parent";
+  const canvas = document.createElement("canvas");
+  canvas.width = canvasWidth;
+  canvas.height = canvasHeight;
+  canvas.className = "world-grid";
+  parent.appendChild(canvas);
+  document.getElementById("elements").appendChild(parent);
+
+  const context = canvas.getContext("2d");
+  const cellWidth = canvasWidth / gridWidth;
+  const cellHeight = canvasHeight / gridHeight;
+  const radius = Math.min(cellWidth, cellHeight) / 2;
+  const cooperators = new Int32Array(gridWidth * gridHeight);
+  const defectors = new Int32Array(gridWidth * gridHeight);
+
+  // Fill styles from the cooperator to the defector color by share of defectors
+  const SHADES = 16;
+  const fillStyles = [];
+  for (let shade = 0; shade <= SHADES; shade++) {
+    const share = shade / SHADES;
+    const rgb = colors.cooperator.map((c, i) => Math.round(c + (colors.defector[i] - c) * share));
+    fillStyles.push(`rgb(${rgb.join(",")})`);
+  }
+
+  const decode = (text) => {
+    const bytes = Uint8Array.from(atob(text), (c) => c.charCodeAt(0));
+    return new Int32Array(bytes.buffer);
+  };
+
+  const drawCell = (cell) => {
+    const x = Math.floor(cell / gridHeight);
+    // Row 0 is at the bottom, like in CanvasGrid
+    const y = gridHeight - (cell % gridHeight) - 1;
+    context.clearRect(x * cellWidth, y * cellHeight, cellWidth, cellHeight);
+    const total = cooperators[cell] + defectors[cell];
+    if (total === 0) return;
+
+    context.fillStyle = fillStyles[Math.round((defectors[cell] / total) * SHADES)];
+    context.beginPath();
+    context.arc((x + 0.5) * cellWidth, (y + 0.5) * cellHeight, radius, 0, 2 * Math.PI);
+    context.fill();
+    if (total > 1) {
+      context.fillStyle = "white";
+      context.textAlign = "center";
+      context.textBaseline = "middle";
+      context.fillText(total, (x + 0.5) * cellWidth, (y + 0.5) * cellHeight);
+    }
+  };
+
+  this.render = (data) => {
+    if (data.full) this.reset();
+    const cells = decode(data.cells);
+    for (let i = 0; i < cells.length; i += 3) {
+      const cell = cells[i];
+      cooperators[cell] = cells[i + 1];
+      defectors[cell] = cells[i + 2];
+      drawCell(cell);
+    }
+  };
+
+  this.reset = () => {
+    cooperators.fill(0);
+    defectors.fill(0);
+    context.clearRect(0, 0, canvasWidth, canvasHeight);
+  };
+};
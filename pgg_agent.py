@@ -0,0 +1,214 @@
+from population import Column
+
+# Agent types
+COOPERATOR = 0
+DEFECTOR = 1
+
+INITIAL_WEALTH = 20
+
+
+class PGGAgent:
+    """
+
+    Shared behaviour of Cooperators and Defectors.
+
+    An agent is a lightweight view on its row of the model's Population: it only holds
+    its unique_id, the model and the row in __slots__, every other attribute is read from
+    and written to the population arrays. It does not derive from mesa.Agent, whose
+    instances always carry a __dict__; the scheduler and the grid only need unique_id,
+    pos and step.
+
+    Subclasses set kind and the PROBABILITY_CONTRIBUTING table.
+
+    """
+    __slots__ = ("unique_id", "model", "row")
+
+    kind = None
+
+    # Moral worth bands and the probability of contributing and contribution amount in each
+    # band, the defaults of the model's BandTable
+    BANDS = ((-20, -11), (-10, -1), (0, 0), (1, 10), (11, 20))
+    PROBABILITY_CONTRIBUTING = ()
+    CONTRIBUTION_AMOUNT = (17.7, 17.7, 17.7, 17.7, 17.7)  # Copenhagen
+    FIXED_LOSS = 2
+
+    # Punishment, the default of the model's punishment_probabilities
+    punishment_probabilities = (0.43, 0.77, 0.01, 0.15, 0.13)
+    COST_PUNISH_AGENT = 1
+    AGENT_PUNISHMENT = 3
+
+    wealth = Column(tracked=True)
+    moral_worth = Column(tracked=True)
+    probability_contributing = Column()
+    contribution_amount = Column()
+    invest = Column()
+    invest_step = Column()
+    tracked = Column()
+    # data collector
+    ap_freq = Column(tracked=True)
+    asp_freq = Column(tracked=True)
+    ap_money_spent = Column(tracked=True)
+    asp_money_spent = Column(tracked=True)
+    ap_money_lost = Column(tracked=True)
+    asp_money_lost = Column(tracked=True)
+
+    def __init__(self, unique_id, model, wealth=INITIAL_WEALTH):
+        self.unique_id = unique_id
+        self.model = model
+        self.row = model.population.add_row(unique_id, self)
+        self.reset(wealth)
+        model.aggregates.add(self)
+
+    @classmethod
+    def view(cls, model, row):
+        """
+
+        Agent object for a row that already holds the state of an agent, as in a restored
+        population; nothing is written to the arrays
+
+        """
+        agent = cls.__new__(cls)
+        agent.unique_id = int(model.population.unique_id[row])
+        agent.model = model
+        agent.row = row
+        model.population.agents[row] = agent
+
+        return agent
+
+    def reset(self, wealth):
+        """
+
+        Sets the state of a newly created agent, keeping only the position
+
+        """
+        self.model.population.kind[self.row] = self.kind
+        self.wealth = wealth
+        self.moral_worth = 0
+        self.probability_contributing = self.calculate_probability_contributing()
+        self.contribution_amount = self.calculate_contribution_amount()
+        self.invest_step = -1
+        self.invest = self.calculate_invest()
+        self.ap_freq = 0
+        self.asp_freq = 0
+        self.ap_money_spent = 0
+        self.asp_money_spent = 0
+        self.ap_money_lost = 0
+        self.asp_money_lost = 0
+
+    @property
+    def pos(self):
+        x = self.model.population.x[self.row]
+        if x < 0:
+            return None
+        return int(x), int(self.model.population.y[self.row])
+
+    @pos.setter
+    def pos(self, pos):
+        if pos is None:
+            pos = (-1, -1)
+        self.model.population.x[self.row], self.model.population.y[self.row] = pos
+
+    @property
+    def random(self):
+        return self.model.random
+
+    def move(self):
+        """
+
+        Moves the agent to a random cell of its Moore neighbourhood
+
+        """
+        x, y = self.pos
+        grid = self.model.grid
+        offsets = self.model.move_offsets
+        dx, dy = offsets[int(self.model.streams.movement_draws[self.row] * len(offsets))]
+        grid.move_agent(self, ((x + dx) % grid.width, (y + dy) % grid.height))
+
+    def calculate_probability_contributing(self):
+        """
+
+        A function that defines the probability of contribution according to the agent's moral worth,
+        looked up in the model's BandTable
+
+        """
+        self.probability_contributing = self.model.bands.probability(self.kind, self.moral_worth)
+
+        return self.probability_contributing
+
+    def calculate_contribution_amount(self):
+        """
+
+        A function that defines the contribution amount according to the agent's moral worth
+
+        """
+        self.contribution_amount = self.model.bands.amount(self.kind, self.moral_worth)
+
+        return self.contribution_amount
+
+    def calculate_invest(self):
+        """
+
+        The investment decision of the current step. It is drawn once per step and
+        reused until the model invalidates the decisions at the start of the next step.
+
+        """
+        if self.invest_step != self.model.decision_step:
+            self.invest = self.draw_invest()
+            self.invest_step = self.model.decision_step
+
+        return self.invest
+
+    def draw_invest(self):
+        """
+
+        A method that defines the investment behaviors of agents
+
+        """
+        if self.calculate_probability_contributing() >= self.model.streams.contribution_draws[self.row]:
+            invest = self.calculate_contribution_amount()
+        else:
+            invest = self.FIXED_LOSS
+
+        return invest
+
+    def moral_worth_assignment(self):
+        """
+
+        This function gives moral worth to agents according to their contribution behaviors
+
+        """
+        invest = self.calculate_invest()
+        if 3 <= invest <= 10:
+            self.moral_worth += 1
+        elif 11 <= invest <= 20:
+            self.moral_worth += 2
+        elif invest <= self.FIXED_LOSS:
+            self.moral_worth -= 1
+
+        return self.moral_worth
+
+    def switches_type(self):
+        """
+
+        Whether the investment of this step makes the agent change its type
+
+        """
+        raise NotImplementedError
+
+    def agent_transform(self):
+        """
+
+        A method that mutates agents according to their investment behaviors.
+        The switch is queued and applied by the model at the end of the step.
+
+        """
+        if self.switches_type():
+            self.model.queue_switch(self)
+
+    def step(self):
+        if self.model.movement == "random":
+            self.move()
+        if self.wealth > 0:
+            self.calculate_invest()
+            self.agent_transform()
+            self.moral_worth_assignment()
@@ -0,0 +1,123 @@
+import numpy as np
+
+# Per agent arrays of a Population and their dtypes
+FIELDS = {
+    "kind": np.int8,
+    "unique_id": np.int64,
+    "wealth": np.float64,
+    "moral_worth": np.float64,
+    "probability_contributing": np.float64,
+    "contribution_amount": np.float64,
+    "invest": np.float64,
+    "invest_step": np.int64,
+    "x": np.int64,
+    "y": np.int64,
+    "tracked": np.bool_,
+    # data collector
+    "ap_freq": np.int64,
+    "asp_freq": np.int64,
+    "ap_money_spent": np.int64,
+    "asp_money_spent": np.int64,
+    "ap_money_lost": np.int64,
+    "asp_money_lost": np.int64,
+}
+
+
+class Population:
+    """
+
+    Model owned struct-of-arrays holding the state of every agent.
+
+    Each agent owns one row of the arrays for the lifetime of the model, a type switch
+    reuses the row. The vectorized engine works on the arrays directly and the agent
+    objects of the agent engine are views that read and write their row.
+
+    """
+
+    def __init__(self, capacity):
+        self.size = 0
+        self.agents = [None] * capacity
+        for name, dtype in FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.x[:] = -1
+        self.y[:] = -1
+
+    def __len__(self):
+        return self.size
+
+    def add_row(self, unique_id, agent=None):
+        """
+
+        Reserves the next free row for an agent and returns it
+
+        """
+        if self.size == len(self.agents):
+            raise ValueError(f"The population is full, it was created for {self.size} agents")
+        row = self.size
+        self.size += 1
+        self.unique_id[row] = unique_id
+        self.agents[row] = agent
+
+        return row
+
+    @classmethod
+    def from_arrays(cls, kind, moral_worth, x, y, wealth):
+        """
+
+        Population without agent objects, used by the vectorized engine
+
+        """
+        population = cls(len(kind))
+        population.size = len(kind)
+        population.unique_id[:] = np.arange(1, len(kind) + 1)
+        population.kind[:] = kind
+        population.moral_worth[:] = moral_worth
+        population.x[:] = x
+        population.y[:] = y
+        population.wealth[:] = wealth
+
+        return population
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+
+        Population that uses the given arrays as they are, which may be memory mapped.
+        columns maps every name of FIELDS to an array of the same length.
+
+        """
+        population = cls.__new__(cls)
+        population.size = len(columns["kind"])
+        population.agents = [None] * population.size
+        for name in FIELDS:
+            setattr(population, name, columns[name])
+
+        return population
+
+
+class Column:
+    """
+
+    Agent attribute stored in the model's Population at the agent's row, read back as a
+    plain Python number.
+    With tracked=True every assignment forwards its delta to the model's AggregateTracker.
+
+    """
+
+    def __init__(self, tracked=False):
+        self.tracked = tracked
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, agent, owner=None):
+        if agent is None:
+            return self
+        return getattr(agent.model.population, self.name)[agent.row].item()
+
+    def __set__(self, agent, value):
+        population = agent.model.population
+        column = getattr(population, self.name)
+        if self.tracked and population.tracked[agent.row]:
+            agent.model.aggregates.change(agent.kind, self.name, value - column[agent.row].item())
+        column[agent.row] = value
@@ -0,0 +1,80 @@
+import numpy as np
+
+from pgg_agent import PGGAgent
+from spatial import NeighborIndex
+
+# Population arrays changed by the punishment stage
+PUNISHMENT_FIELDS = ("wealth", "ap_freq", "asp_freq", "ap_money_spent", "asp_money_spent", "ap_money_lost",
+                     "asp_money_lost")
+
+
+def punishment_decisions(gap, draws, probabilities):
+    """
+
+    Altruistic and antisocial punishment decisions of a batch of pairs from the investment
+    gap between punisher and target, and three uniform draws per pair: the altruistic
+    draws of the low and the high gap and the antisocial draw. Returns the two masks.
+
+    """
+    # Altruistic Punishment
+    ap_low = (gap > 0) & (draws[0] <= probabilities[0]) & (1 <= gap) & (gap <= 10)
+    ap_high = (gap > 0) & (draws[0] > probabilities[0]) & (draws[1] <= probabilities[1]) & (11 <= gap) & (gap <= 20)
+
+    # Antisocial Punishment
+    asp_low = (gap < 0) & (draws[2] <= probabilities[2]) & (1 <= -gap) & (-gap <= 10)
+    asp_high = (gap > 0) & (draws[2] <= probabilities[3]) & (11 <= -gap) & (-gap <= 20)
+
+    return ap_low | ap_high, asp_low | asp_high
+
+
+def punishment_stage(population, width, height, active, probabilities, rng):
+    """
+
+    One punishment stage of a step, resolved for all pairs at once.
+
+    Every active agent is paired with one random agent of its Moore neighbourhood in the
+    occupancy after the move phase. All decisions are taken on the investments of the
+    step before any wealth changes, so the outcome does not depend on the order of the
+    agents. The wealth losses of punishers and targets and the counters of the
+    punishers are then applied with one scatter-add per array, a target punished by
+    several neighbours loses once per punisher.
+
+    Draws four uniform numbers per active agent from rng: the neighbour pick and the
+    three punishment draws. Returns the change of every array in PUNISHMENT_FIELDS,
+    aligned with the population rows.
+
+    """
+    size = len(population)
+    x = population.x[:size]
+    y = population.y[:size]
+    punishers = np.flatnonzero(active[:size])
+    draws = rng.random((4, len(punishers)))
+
+    index = NeighborIndex(x, y, width, height)
+    targets, found = index.sample_neighbors(x[punishers], y[punishers], draws[0])
+    punishers = punishers[found]
+    targets = targets[found]
+
+    gap = population.invest[punishers] - population.invest[targets]
+    ap, asp = punishment_decisions(gap, draws[1:, found], probabilities)
+    punished = ap.astype(np.int64) + asp
+
+    def scatter(rows, weights):
+        return np.bincount(rows, weights=weights, minlength=size)
+
+    changes = {
+        "wealth": -PGGAgent.COST_PUNISH_AGENT * scatter(punishers, punished)
+                  - PGGAgent.AGENT_PUNISHMENT * scatter(targets, punished),
+        "ap_freq": scatter(punishers, ap),
+        "asp_freq": scatter(punishers, asp),
+        "ap_money_spent": PGGAgent.COST_PUNISH_AGENT * scatter(punishers, ap),
+        "asp_money_spent": PGGAgent.COST_PUNISH_AGENT * scatter(punishers, asp),
+        "ap_money_lost": PGGAgent.AGENT_PUNISHMENT * scatter(punishers, ap),
+        "asp_money_lost": PGGAgent.AGENT_PUNISHMENT * scatter(punishers, asp),
+    }
+    for name in PUNISHMENT_FIELDS:
+        column = getattr(population, name)
+        changes[name] = changes[name].astype(column.dtype)
+        column[:size] += changes[name]
+
+    return changes
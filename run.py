@@ -1,4 +1,14 @@
-from server import server
+import argparse
 
-server.launch(open_browser=True)
+from server import fast_forward_server, server
+
+parser = argparse.ArgumentParser(description="Visualization of the PublicGoodGame model")
+parser.add_argument("--fast-forward", action="store_true",
+                    help="run the model in the background and only show throttled snapshots")
+parser.add_argument("--fps", type=int, default=10, help="snapshots per second in fast forward mode")
+args = parser.parse_args()
 
+if args.fast_forward:
+    server = fast_forward_server(args.fps)
+
+server.launch(open_browser=True)
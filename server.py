@@ -4,9 +4,8 @@ from mesa.visualization.modules import CanvasGrid, ChartModule, TextElement, Bar
 from mesa.visualization.ModularVisualization import CHART_JS_FILE, VisualizationElement
 
 
-from cooperator import Cooperator
-from defector import Defector
-
+from delta_grid import DeltaGrid, DeltaGridServer
+from fast_forward import FastForwardModel
 from PGG_model import PublicGoodGame
 
 
@@ -29,25 +28,17 @@ def render(self, model):
     return current_values
 
 
-def agents_portrayal(agent):
-    if type(agent) is Cooperator:
-        portrayal = {
-            "Shape": "circle",
-            "Filled": "true",
-            "Layer": 0,
-            "Color": "green",
-            "r": 0.5,
-        }
-    if type(agent) is Defector:
-        portrayal = {
-            "Shape": "circle",
-            "Filled": "true",
-            "Layer": 0,
-            "Color": "red",
-            "r": 0.5,
-        }
+class FastForwardServer(DeltaGridServer):
+    """
+
+    DeltaGridServer that stops the background run of the previous FastForwardModel on reset
+
+    """
 
-    return portrayal
+    def reset_model(self):
+        if getattr(self, "model", None) is not None:
+            self.model.stop()
+        super().reset_model()
 
 
 model_params = {
@@ -58,7 +49,7 @@ model_params = {
     # "altruistic_punishment_freq": mesa.visualization.Slider("Frequency of Punishment", 4, 0, 300, 1),
 }
 
-grid = mesa.visualization.CanvasGrid(agents_portrayal, 10, 10, 500, 500)
+grid = DeltaGrid(10, 10, canvas_width=500, canvas_height=500)
 agent_count_graphs = BarChartModule(
     [
         {"Label": "Cooperator Count", "Color": "Green"},
@@ -116,11 +107,27 @@ common_pool_graph = BarChartModule(
 
 
 # server
-server = mesa.visualization.ModularServer(PublicGoodGame,
-                                          [grid, common_pool_graph, agent_count_graphs, agent_wealth_graphs,
-                                           agent_moral_worth_graphs, punishment_freq_graphs, punishment_money_graphs],
-                                          "PublicGoodGame",
-                                          model_params,
-                                          )
-
-
+server = DeltaGridServer(PublicGoodGame,
+                         [grid, common_pool_graph, agent_count_graphs, agent_wealth_graphs,
+                          agent_moral_worth_graphs, punishment_freq_graphs, punishment_money_graphs],
+                         "PublicGoodGame",
+                         model_params,
+                         )
+
+
+def fast_forward_server(fps=10, max_size=50):
+    """
+
+    Server that runs the model in the background at full speed and shows at most fps
+    snapshots per second, with the grid downsampled to at most max_size x max_size blocks
+
+    """
+    params = dict(model_params, fps=fps, max_size=max_size)
+    occupancy_grid = DeltaGrid(model_params["width"], model_params["height"], max_size)
+
+    return FastForwardServer(FastForwardModel,
+                             [occupancy_grid, common_pool_graph, agent_count_graphs, agent_wealth_graphs,
+                              agent_moral_worth_graphs, punishment_freq_graphs, punishment_money_graphs],
+                             "PublicGoodGame (fast forward)",
+                             params,
+                             )
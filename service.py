@@ -0,0 +1,392 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import tornado.web
+import tornado.websocket
+
+from PGG_model import PublicGoodGame
+
+logger = logging.getLogger(__name__)
+
+# PublicGoodGame parameters a client can set when it submits a session
+SESSION_PARAMS = ("num_cooperators", "defector_ratio", "width", "height", "multiplier", "engine", "grid",
+                  "movement", "collector", "seed", "punishment_probabilities")
+# Session parameters a client does not have to set. The service only reads the model
+# series, so sessions do not collect the per agent series by default.
+SESSION_DEFAULTS = {"collector": "model"}
+
+
+def to_json(value):
+    return json.dumps(value, default=lambda item: item.item())
+
+
+# Models of the sessions by session id. A session with a worker process of its own has
+# its model in the dict of that process.
+models = {}
+
+
+def model_state(model):
+    return {"step": model.schedule.steps, "running": model.running, "stop_reason": model.stop_reason}
+
+
+def create_model(session_id, params):
+    models[session_id] = PublicGoodGame(**params)
+
+    return model_state(models[session_id])
+
+
+def step_chunk(session_id, steps, seconds):
+    """
+
+    Steps the model of a session for at most steps steps or until seconds of wall time
+    are used up, whichever comes first, and returns the StepRecords as dicts together
+    with the model state. Runs on a worker thread or in the worker process of the session.
+
+    """
+    model = models[session_id]
+    start = time.monotonic()
+    records = []
+    for record in model.iter_steps(steps):
+        records.append(record._asdict())
+        if time.monotonic() - start >= seconds:
+            break
+
+    return records, model_state(model)
+
+
+def model_results(session_id):
+    frame = models[session_id].datacollector.get_model_vars_dataframe()
+
+    return {name: frame[name].tolist() for name in frame.columns}
+
+
+class Session:
+    """
+
+    One PublicGoodGame of a client and the steps queued for it.
+
+    Everything that touches the model runs on the SessionManager's worker pool or, with
+    processes, in a worker process of the session's own that keeps the model for the
+    lifetime of the session. Calls run one at a time per session. Queued steps are
+    run in chunks of bounded wall time, so a large model never holds a worker for long
+    and the sessions take turns. The StepRecords of every chunk are pushed to the
+    subscribed streams.
+
+    """
+
+    def __init__(self, manager, params):
+        self.id = uuid.uuid4().hex
+        self.manager = manager
+        self.params = params
+        self.worker = None
+        self.state = None
+        self.lock = asyncio.Lock()
+        self.pending = 0
+        self.task = None
+        self.latest = None
+        self.error = None
+        self.subscribers = set()
+        self.last_active = time.monotonic()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    async def run(self, function, *args):
+        async with self.lock:
+            return await self.manager.run(self, function, self.id, *args)
+
+    async def start(self):
+        if self.manager.processes:
+            self.worker = ProcessPoolExecutor(max_workers=1)
+        self.state = await self.run(create_model, self.params)
+
+    def queue_steps(self, steps):
+        self.touch()
+        self.pending += steps
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.step_loop())
+
+    async def step_loop(self):
+        try:
+            while self.pending > 0 and self.state["running"]:
+                records, self.state = await self.run(step_chunk, self.pending, self.manager.chunk_seconds)
+                self.pending = max(0, self.pending - len(records))
+                self.touch()
+                if records:
+                    self.latest = records[-1]
+                    self.publish(records)
+        except Exception as error:
+            logger.exception("Session %s failed", self.id)
+            self.error = repr(error)
+        self.pending = 0
+
+    def publish(self, records):
+        message = to_json(records)
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.write_message(message)
+            except tornado.websocket.WebSocketClosedError:
+                self.subscribers.discard(subscriber)
+
+    def idle(self, now):
+        return (self.pending == 0 and not self.subscribers
+                and now - self.last_active > self.manager.idle_timeout)
+
+    def close(self):
+        self.pending = 0
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+        self.subscribers.clear()
+        if self.worker is not None:
+            self.worker.shutdown(wait=False, cancel_futures=True)
+        models.pop(self.id, None)
+
+    def status(self):
+        return {
+            "id": self.id,
+            "params": self.params,
+            "step": self.state["step"],
+            "running": self.state["running"],
+            "stop_reason": self.state["stop_reason"],
+            "pending": self.pending,
+            "latest": self.latest,
+            "error": self.error,
+        }
+
+
+class SessionManager:
+    """
+
+    The sessions of all clients and the bounded pool their models run on.
+
+    At most workers models step at the same time, the event loop only schedules chunks
+    and serves requests, so a heavy session slows the others down instead of freezing
+    them. By default the workers are threads, which the agent engine holds the GIL in
+    for its whole step, so its sessions take turns on one core. With processes every
+    session steps its model in a worker process of its own instead, and up to workers
+    sessions, by default one per core, step in parallel.
+
+    Sessions without queued steps, streams and requests for idle_timeout seconds are
+    closed, and max_sessions bounds how many can be open at once.
+
+    """
+
+    def __init__(self, workers=None, idle_timeout=600, chunk_seconds=0.2, max_sessions=None, processes=False):
+        self.pool = None if processes else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="session")
+        self.slots = asyncio.Semaphore(workers or os.cpu_count()) if processes else None
+        self.processes = processes
+        self.idle_timeout = idle_timeout
+        self.chunk_seconds = chunk_seconds
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.eviction = None
+
+    async def run(self, session, function, *args):
+        loop = asyncio.get_running_loop()
+        if session.worker is None:
+            return await loop.run_in_executor(self.pool, function, *args)
+        async with self.slots:
+            return await loop.run_in_executor(session.worker, function, *args)
+
+    async def create(self, params):
+        unknown = set(params) - set(SESSION_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown parameters {sorted(unknown)}")
+        if self.max_sessions is not None and len(self.sessions) >= self.max_sessions:
+            raise tornado.web.HTTPError(503, reason="Too many sessions")
+        session = Session(self, dict(SESSION_DEFAULTS, **params))
+        try:
+            await session.start()
+        except BaseException:
+            session.close()
+            raise
+        self.sessions[session.id] = session
+        logger.info("Session %s started with %s", session.id, session.params)
+
+        return session
+    def get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise tornado.web.HTTPError(404, reason=f"Unknown session {session_id}")
+        session.touch()
+
+        return session
+
+    def close(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+            logger.info("Session %s closed", session_id)
+
+    def start_eviction(self):
+        self.eviction = asyncio.create_task(self.evict_idle())
+
+    async def evict_idle(self):
+        while True:
+            await asyncio.sleep(max(1, self.idle_timeout / 4))
+            now = time.monotonic()
+            for session in list(self.sessions.values()):
+                if session.idle(now):
+                    logger.info("Session %s idle for %ss, evicting", session.id, self.idle_timeout)
+                    self.close(session.id)
+
+    def shutdown(self):
+        if self.eviction is not None:
+            self.eviction.cancel()
+        for session_id in list(self.sessions):
+            self.close(session_id)
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class SessionHandler(tornado.web.RequestHandler):
+    def initialize(self, manager):
+        self.manager = manager
+
+    def json_body(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except json.JSONDecodeError as error:
+            raise tornado.web.HTTPError(400, reason=f"Invalid JSON: {error}")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="The body must be a JSON object")
+
+        return body
+
+    def write_json(self, value, status=200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(to_json(value))
+
+    def write_error(self, status_code, **kwargs):
+        self.set_header("Content-Type", "application/json")
+        self.finish(to_json({"error": self._reason}))
+
+
+class SessionsHandler(SessionHandler):
+    async def post(self):
+        """
+
+        Submits a new session, the body holds the PublicGoodGame parameters
+
+        """
+        try:
+            session = await self.manager.create(self.json_body())
+        except (TypeError, ValueError) as error:
+            raise tornado.web.HTTPError(400, reason=str(error))
+        self.write_json(session.status(), 201)
+
+    def get(self):
+        self.write_json([session.status() for session in self.manager.sessions.values()])
+
+
+class StatusHandler(SessionHandler):
+    def get(self, session_id):
+        self.write_json(self.manager.get(session_id).status())
+
+    def delete(self, session_id):
+        self.manager.get(session_id)
+        self.manager.close(session_id)
+        self.set_status(204)
+
+
+class StepHandler(SessionHandler):
+    def post(self, session_id):
+        """
+
+        Queues steps, {"steps": n}, and returns at once, the steps run in the background
+
+        """
+        session = self.manager.get(session_id)
+        steps = self.json_body().get("steps", 1)
+        if not isinstance(steps, int) or isinstance(steps, bool) or steps < 1:
+            raise tornado.web.HTTPError(400, reason="steps must be a positive integer")
+        session.queue_steps(steps)
+        self.write_json(session.status(), 202)
+
+
+class ResultsHandler(SessionHandler):
+    async def get(self, session_id):
+        """
+
+        The collected model reporter series of the session
+
+        """
+        session = self.manager.get(session_id)
+        self.write_json({"step": session.state["step"],
+                         "model_vars": await session.run(model_results)})
+
+
+class StreamHandler(tornado.websocket.WebSocketHandler):
+    """
+
+    Pushes the StepRecords of a session as JSON lists, one message per chunk of steps
+
+    """
+
+    def initialize(self, manager):
+        self.manager = manager
+        self.session = None
+
+    def open(self, session_id):
+        self.session = self.manager.get(session_id)
+        self.session.subscribers.add(self)
+        if self.session.latest is not None:
+            self.write_message(to_json([self.session.latest]))
+
+    def on_close(self):
+        if self.session is not None:
+            self.session.subscribers.discard(self)
+            self.session.touch()
+
+
+def make_app(manager):
+    routes = [
+        (r"/sessions", SessionsHandler),
+        (r"/sessions/(\w+)", StatusHandler),
+        (r"/sessions/(\w+)/step", StepHandler),
+        (r"/sessions/(\w+)/results", ResultsHandler),
+        (r"/sessions/(\w+)/stream", StreamHandler),
+    ]
+
+    return tornado.web.Application([(pattern, handler, {"manager": manager}) for pattern, handler in routes])
+
+
+async def serve(port, manager):
+    make_app(manager).listen(port)
+    manager.start_eviction()
+    logger.info("Serving PublicGoodGame sessions on port %d", port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        manager.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PublicGoodGame sessions of several clients on a shared worker pool")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=None, help="models stepping at once, defaults to the "
+                                                                  "thread pool default, or the cores with --processes")
+    parser.add_argument("--processes", action="store_true",
+                        help="step every session in a worker process of its own, so agent engine sessions "
+                             "use several cores instead of taking turns on one")
+    parser.add_argument("--idle-timeout", type=float, default=600, help="seconds before an idle session is closed")
+    parser.add_argument("--chunk-seconds", type=float, default=0.2,
+                        help="wall time a session steps before it hands its worker back")
+    parser.add_argument("--max-sessions", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    manager = SessionManager(args.workers, args.idle_timeout, args.chunk_seconds, args.max_sessions,
+                             args.processes)
+    asyncio.run(serve(args.port, manager))
+
+
+if __name__ == '__main__':
+    main()
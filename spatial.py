@@ -0,0 +1,145 @@
+import numpy as np
+
+
+def moore_offsets(width, height):
+    """
+
+    Distinct (dx, dy) offsets of the Moore neighbourhood on a torus, without the center.
+    Small grids wrap onto themselves, so duplicated cells are dropped the same way
+    MultiGrid.get_neighborhood does.
+
+    """
+    offsets = []
+    seen = set()
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            cell = (dx % width, dy % height)
+            if cell == (0, 0) or cell in seen:
+                continue
+            seen.add(cell)
+            offsets.append((dx, dy))
+
+    return np.array(offsets, dtype=np.int64).reshape(-1, 2)
+
+
+class NeighborIndex:
+    """
+
+    Cell occupancy snapshot of a toroidal grid in CSR form.
+
+    The agents are sorted by cell, so the occupants of a cell are the rows
+    order[starts[cell]:starts[cell] + counts[cell]]. The index is built once per step and
+    answers neighbour queries with a few array lookups instead of walking the grid's
+    per-cell lists.
+
+    """
+
+    def __init__(self, x, y, width, height):
+        self.width = width
+        self.height = height
+        self.offsets = moore_offsets(width, height)
+
+        self.cell = np.asarray(x, dtype=np.int64) * height + np.asarray(y, dtype=np.int64)
+        self.order = np.argsort(self.cell, kind="stable")
+        self.counts = np.bincount(self.cell, minlength=width * height)
+        self.starts = np.cumsum(self.counts) - self.counts
+
+    def neighbor_cells(self, x, y):
+        """
+
+        Flat indices of the Moore neighbourhood cells, one row per (x, y)
+
+        """
+        nx = (np.asarray(x)[..., None] + self.offsets[:, 0]) % self.width
+        ny = (np.asarray(y)[..., None] + self.offsets[:, 1]) % self.height
+
+        return nx * self.height + ny
+
+    def sample_neighbors(self, x, y, rand):
+        """
+
+        Picks one random occupant of the Moore neighbourhood of each (x, y) position, using
+        one uniform number in [0, 1) per position. Returns the row of the picked agents and
+        a mask of the positions that had any neighbour.
+
+        """
+        cells = self.neighbor_cells(x, y)
+        counts = self.counts[cells]
+        cumulative = np.cumsum(counts, axis=1)
+        total = cumulative[:, -1]
+
+        pick = (rand * total).astype(np.int64)
+        column = (cumulative > pick[:, None]).argmax(axis=1)
+        rows = np.arange(len(cells))
+        before = cumulative[rows, column] - counts[rows, column]
+        found = total > 0
+        slot = self.starts[cells[rows, column]] + pick - before
+        neighbors = self.order[np.where(found, slot, 0)]
+
+        return neighbors, found
+
+
+class ArrayGrid:
+    """
+
+    Toroidal grid for large, sparsely occupied worlds.
+
+    The positions of the agents already live in the model's Population arrays, so the
+    grid only keeps the number of agents per cell in one flat array indexed by
+    x * height + y, instead of a Python list per cell like MultiGrid. Moves and
+    neighbourhoods use the precomputed Moore offsets. It implements the part of the
+    MultiGrid interface the model uses, for the Moore neighbourhood of radius 1.
+
+    """
+
+    def __init__(self, width, height, torus=True):
+        if not torus:
+            raise ValueError("ArrayGrid only supports toroidal grids")
+        self.width = width
+        self.height = height
+        self.torus = torus
+        self.offsets = moore_offsets(width, height).tolist()
+        self.counts = np.zeros(width * height, dtype=np.int32)
+
+    def cell(self, pos):
+        return pos[0] * self.height + pos[1]
+
+    def place_agent(self, agent, pos):
+        agent.pos = pos
+        self.counts[self.cell(pos)] += 1
+
+    def remove_agent(self, agent):
+        self.counts[self.cell(agent.pos)] -= 1
+        agent.pos = None
+
+    def move_agent(self, agent, pos):
+        self.counts[self.cell(agent.pos)] -= 1
+        self.counts[self.cell(pos)] += 1
+        agent.pos = pos
+
+    def get_neighborhood(self, pos, moore=True, include_center=False, radius=1):
+        """
+
+        Cells of the Moore neighbourhood of pos in the order of MultiGrid, with the center
+        last if include_center is set
+
+        """
+        if not moore or radius != 1:
+            raise ValueError("ArrayGrid only supports the Moore neighbourhood of radius 1")
+        x, y = pos
+        neighborhood = [((x + dx) % self.width, (y + dy) % self.height) for dx, dy in self.offsets]
+        if include_center:
+            neighborhood.append(pos)
+
+        return neighborhood
+
+    def rebuild(self, x, y):
+        """
+
+        Recounts all cells after the positions of many agents changed at once
+
+        """
+        self.counts[:] = np.bincount(np.asarray(x) * self.height + y, minlength=len(self.counts))
+
+    def is_cell_empty(self, pos):
+        return self.counts[self.cell(pos)] == 0
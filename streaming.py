@@ -0,0 +1,49 @@
+from collections import namedtuple
+
+from pgg_agent import COOPERATOR, DEFECTOR
+
+STEP_FIELDS = ("step", "cooperators", "defectors", "cooperator_wealth", "defector_wealth",
+               "cooperator_moral_worth", "defector_moral_worth", "ap_frequency", "asp_frequency",
+               "ap_money_spent", "ap_money_lost", "asp_money_spent", "asp_money_lost", "common_pool")
+
+
+class StepRecord(namedtuple("StepRecord", STEP_FIELDS)):
+    """
+
+    Compact summary of one step: agent counts, average wealth and moral worth per type,
+    total punishment frequencies and money, and the common pool
+
+    """
+    __slots__ = ()
+
+    @property
+    def defector_share(self):
+        total = self.cooperators + self.defectors
+        if total == 0:
+            return 0
+        return self.defectors / total
+
+
+def step_record(model):
+    """
+
+    StepRecord of the current state of a model, read from its AggregateTracker
+
+    """
+    aggregates = model.aggregates
+    return StepRecord(
+        step=model.schedule.steps,
+        cooperators=aggregates.count[COOPERATOR],
+        defectors=aggregates.count[DEFECTOR],
+        cooperator_wealth=aggregates.average("wealth", COOPERATOR),
+        defector_wealth=aggregates.average("wealth", DEFECTOR),
+        cooperator_moral_worth=aggregates.average("moral_worth", COOPERATOR),
+        defector_moral_worth=aggregates.average("moral_worth", DEFECTOR),
+        ap_frequency=aggregates.total("ap_freq"),
+        asp_frequency=aggregates.total("asp_freq"),
+        ap_money_spent=aggregates.total("ap_money_spent"),
+        ap_money_lost=aggregates.total("ap_money_lost"),
+        asp_money_spent=aggregates.total("asp_money_spent"),
+        asp_money_lost=aggregates.total("asp_money_lost"),
+        common_pool=model.common_pool,
+    )
@@ -0,0 +1,35 @@
+import numpy as np
+
+# Independent sources of randomness of a model run, one child stream each
+STREAMS = ("placement", "movement", "contribution", "punishment", "schedule")
+
+
+class RandomStreams:
+    """
+
+    One numpy Generator per source of randomness, spawned from a single SeedSequence.
+
+    The streams never share state, so the draws of one phase do not shift the draws of
+    another one, and the same seed gives the same run in any process. Without a seed
+    the SeedSequence draws fresh entropy, which is kept in seed so the run can be repeated.
+
+    """
+
+    def __init__(self, seed=None):
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.seed = self.seed_sequence.entropy
+        for name, child in zip(STREAMS, self.seed_sequence.spawn(len(STREAMS))):
+            setattr(self, name, np.random.default_rng(child))
+        self.movement_draws = None
+        self.contribution_draws = None
+
+    def draw_step(self, size):
+        """
+
+        Draws the uniform numbers the agent objects use during one step in one batch per
+        stream, one row per population row: a movement draw and a contribution draw.
+        The punishment stage draws from the punishment stream itself.
+
+        """
+        self.movement_draws = self.movement.random(size)
+        self.contribution_draws = self.contribution.random(size)
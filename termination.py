@@ -0,0 +1,102 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# StepRecord fields watched by Stationarity by default
+STATIONARY_FIELDS = ("cooperator_wealth", "defector_wealth", "cooperator_moral_worth", "defector_moral_worth",
+                     "ap_frequency", "asp_frequency")
+# StepRecord fields that are running totals, Stationarity watches their change per step
+CUMULATIVE_FIELDS = ("ap_frequency", "asp_frequency")
+
+
+class Fixation:
+    """
+
+    Stops the run once one of the types has been eliminated
+
+    """
+
+    def check(self, model, record):
+        if record.cooperators == 0 and record.defectors == 0:
+            return "fixation: no agents left"
+        if record.cooperators == 0 or record.defectors == 0:
+            survivor = "defectors" if record.cooperators == 0 else "cooperators"
+            return f"fixation: only {survivor} left"
+        return None
+
+
+class Stationarity:
+    """
+
+    Stops the run once the averages of the watched StepRecord fields over the last window
+    steps differ from the averages over the window before by at most tolerance, relative
+    to the earlier average (absolute below 1).
+
+    Running totals among the fields, CUMULATIVE_FIELDS, never settle while punishment
+    goes on, so their increase since the previous record is watched instead. The first
+    record checked only sets the totals to compare against.
+
+    """
+
+    def __init__(self, window=50, tolerance=0.01, fields=STATIONARY_FIELDS):
+        self.window = window
+        self.tolerance = tolerance
+        self.fields = fields
+        self.cumulative = np.array([name in CUMULATIVE_FIELDS for name in fields])
+        self.totals = None
+        self.history = deque(maxlen=2 * window)
+
+    def check(self, model, record):
+        values = np.array([getattr(record, name) for name in self.fields], dtype=np.float64)
+        totals, self.totals = self.totals, values
+        if totals is None and self.cumulative.any():
+            return None
+        if totals is not None:
+            values = np.where(self.cumulative, values - totals, values)
+        self.history.append(values)
+        if len(self.history) < 2 * self.window:
+            return None
+
+        values = np.array(self.history)
+        previous = values[:self.window].mean(axis=0)
+        latest = values[self.window:].mean(axis=0)
+        if np.all(np.abs(latest - previous) <= self.tolerance * np.maximum(np.abs(previous), 1)):
+            return f"stationary over {self.window} steps"
+        return None
+
+
+class WallClock:
+    """
+
+    Stops the run once more than seconds of wall time have passed since start, a
+    time.monotonic() value that defaults to the creation of the criterion, which is
+    built together with the model, so setting up the model counts against the budget
+
+    """
+
+    def __init__(self, seconds, start=None):
+        self.seconds = seconds
+        self.start = time.monotonic() if start is None else start
+
+    def check(self, model, record):
+        if time.monotonic() - self.start > self.seconds:
+            return f"wallclock budget of {self.seconds}s used up"
+        return None
+
+
+def criteria(fixation=False, stationary_window=None, tolerance=0.01, max_seconds=None):
+    """
+
+    List of termination criteria for PublicGoodGame from plain options
+
+    """
+    termination = []
+    if fixation:
+        termination.append(Fixation())
+    if stationary_window:
+        termination.append(Stationarity(stationary_window, tolerance))
+    if max_seconds:
+        termination.append(WallClock(max_seconds))
+
+    return termination
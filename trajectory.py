@@ -0,0 +1,174 @@
+import json
+import os
+
+import numpy as np
+
+# One fixed width record per agent and step
+TRAJECTORY_DTYPE = np.dtype([
+    ("wealth", "<f8"),
+    ("moral_worth", "<f8"),
+    ("kind", "i1"),
+    ("x", "<i4"),
+    ("y", "<i4"),
+])
+TRAJECTORY_VERSION = 1
+
+
+class TrajectoryWriter:
+    """
+
+    Appends the state of every agent after every step to path/trajectory.bin, one row of
+    TRAJECTORY_DTYPE records per step in population row order, so the file is a
+    (steps, agents) array on disk. The agent ids of the rows are in path/agent_id.npy
+    and the layout in path/meta.json.
+
+    A row of the population belongs to the same agent for the whole run, a type switch
+    only changes its kind. The files are created at the first recorded step. With resume
+    an existing trajectory is continued instead, and recording a step that was already
+    written, after resuming from a checkpoint, drops that step and every later one first.
+
+    """
+
+    def __init__(self, path, population, resume=False):
+        self.path = path
+        self.population = population
+        self.row_bytes = len(population) * TRAJECTORY_DTYPE.itemsize
+        self.records = np.empty(len(population), dtype=TRAJECTORY_DTYPE)
+        self.first_step = None
+        self.file = None
+        if resume and os.path.exists(os.path.join(path, "meta.json")):
+            self.reopen()
+
+    def reopen(self):
+        with open(os.path.join(self.path, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+        if meta["agents"] != len(self.population):
+            raise ValueError(f"{self.path} holds a trajectory of {meta['agents']} agents, "
+                             f"not {len(self.population)}")
+        self.first_step = meta["first_step"]
+        self.file = open(os.path.join(self.path, "trajectory.bin"), "r+b")
+        self.file.seek(0, os.SEEK_END)
+
+    def create(self, first_step):
+        os.makedirs(self.path, exist_ok=True)
+        self.first_step = first_step
+        np.save(os.path.join(self.path, "agent_id.npy"), self.population.unique_id[:len(self.population)])
+        meta = {
+            "version": TRAJECTORY_VERSION,
+            "agents": len(self.population),
+            "first_step": first_step,
+            "dtype": TRAJECTORY_DTYPE.descr,
+        }
+        with open(os.path.join(self.path, "meta.json"), "w") as meta_file:
+            json.dump(meta, meta_file)
+        self.file = open(os.path.join(self.path, "trajectory.bin"), "w+b")
+
+    def record(self, model):
+        if self.file is None:
+            self.create(model.schedule.steps)
+        offset = (model.schedule.steps - self.first_step) * self.row_bytes
+        if offset < 0 or offset > self.file.tell():
+            raise ValueError(f"Step {model.schedule.steps} does not follow the steps in {self.path}")
+        if offset < self.file.tell():
+            self.file.seek(offset)
+            self.file.truncate()
+
+        population = model.population
+        size = len(population)
+        records = self.records
+        for name in TRAJECTORY_DTYPE.names:
+            records[name] = getattr(population, name)[:size]
+        self.file.write(records.tobytes())
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class TrajectoryReader:
+    """
+
+    Read access to a trajectory written by TrajectoryWriter.
+
+    The file is memory mapped, so only the pages that are touched are read from disk.
+    data is the (steps, agents) record array, and every slice returned here is a view on
+    it, no data is copied. Steps are model steps, from first_step on; agents are selected
+    by agent id. refresh maps the steps written since the reader was opened.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+        if meta["version"] != TRAJECTORY_VERSION:
+            raise ValueError(f"Unsupported trajectory version {meta['version']} in {path}")
+        self.first_step = meta["first_step"]
+        self.dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+        self.agent_id = np.load(os.path.join(path, "agent_id.npy"), mmap_mode="r")
+        self.order = np.argsort(self.agent_id)
+        self.refresh()
+
+    def refresh(self):
+        data_path = os.path.join(self.path, "trajectory.bin")
+        row_bytes = len(self.agent_id) * self.dtype.itemsize
+        steps = os.path.getsize(data_path) // row_bytes if row_bytes else 0
+        if steps == 0:
+            self.data = np.empty((0, len(self.agent_id)), dtype=self.dtype)
+        else:
+            self.data = np.memmap(data_path, dtype=self.dtype, mode="r", shape=(steps, len(self.agent_id)))
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def steps(self):
+        return np.arange(self.first_step, self.first_step + len(self.data))
+
+    def rows(self, agent_ids):
+        """
+
+        Population rows of the given agent ids
+
+        """
+        agent_ids = np.asarray(agent_ids)
+        index = np.searchsorted(self.agent_id, agent_ids, sorter=self.order)
+        rows = self.order[np.minimum(index, len(self.order) - 1)]
+        if np.any(self.agent_id[rows] != agent_ids):
+            raise KeyError(f"Unknown agent ids in {agent_ids}")
+
+        return rows
+
+    def step_slice(self, start=None, stop=None):
+        start = self.first_step if start is None else start
+        stop = self.first_step + len(self.data) if stop is None else stop
+
+        return slice(max(start - self.first_step, 0), max(stop - self.first_step, 0))
+
+    def step_range(self, start=None, stop=None):
+        """
+
+        Records of all agents for the steps start <= step < stop
+
+        """
+        return self.data[self.step_slice(start, stop)]
+
+    def agent(self, agent_id, start=None, stop=None):
+        """
+
+        Records of one agent for the steps start <= step < stop
+
+        """
+        return self.data[self.step_slice(start, stop), int(self.rows(agent_id))]
+
+    def field(self, name, start=None, stop=None):
+        """
+
+        One field of all agents for the steps start <= step < stop, as a (steps, agents) view
+
+        """
+        return self.data[self.step_slice(start, stop)][name]
@@ -0,0 +1,179 @@
+import numpy as np
+
+from aggregates import TRACKED
+from pgg_agent import COOPERATOR, PGGAgent
+from punishment import punishment_stage
+from spatial import moore_offsets
+
+COUNTERS = ("ap_freq", "asp_freq", "ap_money_spent", "asp_money_spent", "ap_money_lost", "asp_money_lost")
+
+
+class VectorizedEngine:
+    """
+
+    Batched stepping of a Population without agent objects.
+
+    A step runs move, invest, punishment, transformation and moral worth updates on the
+    population arrays as array operations instead of one Python call per agent, with the
+    rules and constants of PGGAgent.
+
+    Each agent draws a single investment decision per step which is reused by the
+    punishment, transformation, moral worth and common pool phases. Punishment is played
+    against one random agent of the punisher's Moore neighbourhood, and a transformation
+    switches the type of the acting agent only.
+
+    Every phase draws in one batch from its own stream of the model's RandomStreams.
+
+    """
+
+    def __init__(self, model, population):
+        self.model = model
+        self.population = population
+        self.width = model.grid.width
+        self.height = model.grid.height
+        self.offsets = moore_offsets(self.width, self.height)
+        self.streams = model.streams
+        self.update_aggregates()
+
+    def __len__(self):
+        return len(self.population)
+
+    def initialize(self):
+        """
+
+        Sets up a newly created population: agents compute their probability while their
+        moral worth is still 0
+
+        """
+        population = self.population
+        population.probability_contributing[:] = self.model.bands.probabilities(population.kind, 0)
+
+    def move(self):
+        """
+
+        Moves every agent to a random cell of its Moore neighbourhood
+
+        """
+        population = self.population
+        choice = self.streams.movement.integers(len(self.offsets), size=len(population))
+        population.x[:] = (population.x + self.offsets[choice, 0]) % self.width
+        population.y[:] = (population.y + self.offsets[choice, 1]) % self.height
+
+    def calculate_probability_contributing(self):
+        """
+
+        Updates the probability of contributing of every agent from its moral worth
+
+        """
+        population = self.population
+        population.probability_contributing[:] = self.model.bands.probabilities(population.kind,
+                                                                                population.moral_worth)
+
+        return population.probability_contributing
+
+    def calculate_contribution_amount(self):
+        """
+
+        Updates the contribution amount of every agent from its moral worth
+
+        """
+        population = self.population
+        population.contribution_amount[:] = self.model.bands.amounts(population.kind, population.moral_worth)
+
+        return population.contribution_amount
+
+    def calculate_invest(self):
+        """
+
+        Draws the investment decision of every agent for this step
+
+        """
+        population = self.population
+        probability = self.calculate_probability_contributing()
+        amount = self.calculate_contribution_amount()
+        contributes = probability >= self.streams.contribution.random(len(population))
+        population.invest[:] = np.where(contributes, amount, PGGAgent.FIXED_LOSS)
+
+        return population.invest
+
+    def punishment_behaviors(self, active):
+        """
+
+        Altruistic and antisocial punishment between every active agent and one random
+        neighbour, resolved in one batch by punishment_stage
+
+        """
+        punishment_stage(self.population, self.width, self.height, active, self.model.punishment_probabilities,
+                         self.streams.punishment)
+
+    def agent_transform(self, active):
+        """
+
+        Cooperators that did not contribute become Defectors and Defectors that contributed
+        become Cooperators. A transformed agent keeps its wealth but starts over with a
+        new moral worth, new counters and a random position, as a freshly created agent would.
+        Returns the mask of transformed agents.
+
+        """
+        population = self.population
+        contributed = population.invest > PGGAgent.FIXED_LOSS
+        switch = active & np.where(population.kind == COOPERATOR, ~contributed, contributed)
+        changed = np.flatnonzero(switch)
+
+        population.kind[changed] = 1 - population.kind[changed]
+        population.moral_worth[changed] = 0
+        population.probability_contributing[changed] = self.model.bands.probabilities(population.kind[changed], 0)
+        for name in COUNTERS:
+            getattr(population, name)[changed] = 0
+        population.x[changed] = self.streams.placement.integers(self.width, size=len(changed))
+        population.y[changed] = self.streams.placement.integers(self.height, size=len(changed))
+
+        return switch
+
+    def moral_worth_assignment(self, mask):
+        """
+
+        Moral worth update of the given agents according to their investment
+
+        """
+        invest = self.population.invest
+        delta = np.select(
+            [(3 <= invest) & (invest <= 10), (11 <= invest) & (invest <= 20), invest <= PGGAgent.FIXED_LOSS],
+            [1, 2, -1],
+            default=0,
+        )
+        self.population.moral_worth += np.where(mask, delta, 0)
+
+    def update_aggregates(self):
+        """
+
+        Refreshes the model's AggregateTracker from the arrays
+
+        """
+        population = self.population
+        self.model.aggregates.rebuild(population.kind, {name: getattr(population, name) for name in TRACKED})
+
+    def step(self):
+        """
+
+        One model step: the agent phase followed by the investment and the payoff
+
+        """
+        population = self.population
+        self.move()
+        active = population.wealth > 0
+        self.calculate_invest()
+        self.punishment_behaviors(active)
+        transformed = self.agent_transform(active)
+        self.moral_worth_assignment(active & ~transformed)
+
+        investment = population.invest.sum()
+        self.model.investment += investment
+        self.model.common_pool += investment
+        # Only Cooperator instances receive the payoff in PublicGoodGame.step
+        population.wealth[population.kind == COOPERATOR] += self.model.calculate_payoff()
+
+        self.update_aggregates()
+
+        # No agent objects are scheduled, this only advances the clock
+        self.model.schedule.step()